@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cities import get_forecast_table_name, get_weather_table_name, normalize_city_name
+from .metrics import record_cache
+from .supabase_client import get_async_supabase_client, get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_historical_data(supabase, table_name):
+    """Fetch last 14 days of historical data"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=14)
+
+    logger.info(f"Fetching historical data from {table_name}")
+
+    response = supabase.table(table_name)\
+        .select("*")\
+        .gte('datetime', start_date.isoformat())\
+        .lte('datetime', end_date.isoformat())\
+        .order('datetime', desc=False)\
+        .execute()
+
+    logger.info(f"Found {len(response.data)} historical records")
+    return pd.DataFrame(response.data)
+
+
+def fetch_forecast_data(supabase, table_name):
+    """Fetch next 7 days of forecast data"""
+    logger.info(f"Fetching forecast data from {table_name}")
+
+    response = supabase.table(table_name)\
+        .select("*")\
+        .gte('datetime', datetime.now().isoformat())\
+        .order('datetime')\
+        .limit(8)\
+        .execute()
+
+    logger.info(f"Found {len(response.data)} forecast records")
+    return pd.DataFrame(response.data)
+
+
+def process_data(df):
+    """Process DataFrame into API-ready format"""
+    if df.empty:
+        return {
+            'dates': [],
+            'temp': [],
+            'humidity': [],
+            'precip': [],
+            'windspeed': []
+        }
+
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    return {
+        'dates': df['datetime'].dt.strftime('%b %d').tolist(),
+        'temp': df['temp'].round(1).tolist(),
+        'humidity': df['humidity'].round(1).tolist(),
+        'precip': df['precip'].round(1).tolist(),
+        'windspeed': df['windspeed'].round(1).tolist()
+    }
+
+
+def build_analytics_data(historical, forecast, weather_table, forecast_table):
+    """Combine historical and forecast frames into the analytics payload (minus the city)"""
+    return {
+        'historical': process_data(historical),
+        'forecast': process_data(forecast),
+        'combined': process_data(pd.concat([historical, forecast])),
+        'last_updated': datetime.now().isoformat(),
+        'tables_used': {
+            'historical': weather_table,
+            'forecast': forecast_table
+        }
+    }
+
+
+def _snapshot_key(city):
+    # The 14-day window moves daily, so a snapshot is only valid for the day it was built
+    return f"analytics_snapshot:{normalize_city_name(city)}:{datetime.now().date().isoformat()}"
+
+
+def build_analytics_snapshot(city):
+    """Query, process and serialize the analytics payload for a city, then store it"""
+    supabase = get_supabase_client()
+    weather_table = get_weather_table_name(city)
+    forecast_table = get_forecast_table_name(city)
+
+    historical = fetch_historical_data(supabase, weather_table)
+    forecast = fetch_forecast_data(supabase, forecast_table)
+
+    data = build_analytics_data(historical, forecast, weather_table, forecast_table)
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+    cache.set(_snapshot_key(city), body, timeout=settings.ANALYTICS_SNAPSHOT_TTL)
+    return body
+
+
+async def abuild_analytics_snapshot(city):
+    """Async variant of build_analytics_snapshot with both reads in flight at once"""
+    supabase = get_async_supabase_client()
+    weather_table = get_weather_table_name(city)
+    forecast_table = get_forecast_table_name(city)
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=14)
+    historical, forecast = await asyncio.gather(
+        supabase.table(weather_table)
+            .select("*")
+            .gte('datetime', start_date.isoformat())
+            .lte('datetime', end_date.isoformat())
+            .order('datetime', desc=False)
+            .execute(),
+        supabase.table(forecast_table)
+            .select("*")
+            .gte('datetime', datetime.now().isoformat())
+            .order('datetime')
+            .limit(8)
+            .execute(),
+    )
+
+    data = build_analytics_data(
+        pd.DataFrame(historical.data), pd.DataFrame(forecast.data),
+        weather_table, forecast_table
+    )
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+    await cache.aset(_snapshot_key(city), body, timeout=settings.ANALYTICS_SNAPSHOT_TTL)
+    return body
+
+
+def get_analytics_snapshot(city):
+    """Return the stored serialized payload for a city, or None"""
+    body = cache.get(_snapshot_key(city))
+    record_cache('analytics_snapshots', body is not None)
+    return body
+
+
+async def aget_analytics_snapshot(city):
+    """Async variant of get_analytics_snapshot"""
+    body = await cache.aget(_snapshot_key(city))
+    record_cache('analytics_snapshots', body is not None)
+    return body
+
+
+def render_analytics_snapshot(city, body):
+    """Prefix the stored payload with the city name exactly as requested
+
+    The rest of the payload is shared by every spelling of the city, so the
+    bytes are spliced rather than decoded and re-encoded.
+    """
+    city_field = json.dumps({'city': city.title()}).encode('utf-8')
+    if body == b'{}':
+        return city_field
+    return city_field[:-1] + b', ' + body[1:]
+
+
+def refresh_analytics_snapshots(cities):
+    """Rebuild snapshots after new observations or forecasts land
+
+    Returns the cities whose snapshot could not be rebuilt.
+    """
+    failed = []
+    for city in cities:
+        try:
+            build_analytics_snapshot(city)
+        except Exception as e:
+            logger.warning(f"Could not rebuild analytics snapshot for {city}: {str(e)}")
+            cache.delete(_snapshot_key(city))
+            failed.append(city)
+    return failed
@@ -0,0 +1,55 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+BENCH_EMAIL = 'bench-login@forelast.invalid'
+BENCH_PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = "Measure login latency and queries against verifying the issued access token"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        User.objects.filter(username=BENCH_EMAIL).delete()
+        User.objects.create_user(username=BENCH_EMAIL, email=BENCH_EMAIL, password=BENCH_PASSWORD)
+        client = Client()
+        body = json.dumps({'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                logins, queries = [], []
+                for _ in range(options['requests']):
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = client.post('/api/login/', data=body, content_type='application/json')
+                        logins.append(time.perf_counter() - started)
+                    queries.append(len(captured))
+                access = response.json().get('access')
+
+                verifies, verify_queries = [], []
+                headers = {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+                for _ in range(options['requests']):
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        client.get('/api/me/', **headers)
+                        verifies.append(time.perf_counter() - started)
+                    verify_queries.append(len(captured))
+        finally:
+            User.objects.filter(username=BENCH_EMAIL).delete()
+
+        for name, timings, counts in (('login', logins, queries), ('token check', verifies, verify_queries)):
+            p50 = statistics.median(timings)
+            self.stdout.write(
+                f"{name:12} p50 {p50 * 1000:8.2f} ms   {1 / p50:9.1f} req/s   "
+                f"{statistics.mean(counts):.1f} queries"
+            )
@@ -0,0 +1,86 @@
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from . import views
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    CACHES=LOCMEM,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    AUTH_ACCESS_TOKEN_TTL=900,
+)
+class TokenSessionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User(pk=7, username='ana@example.com', email='ana@example.com')
+        self.user.set_password('correct horse')
+
+        # No database here: both user lookups return the in-memory user
+        users = mock.Mock()
+        users.objects.filter.return_value.first.side_effect = lambda: self.user
+        for name, value in [('User', users), ('_get_user', lambda uid: self.user if uid == self.user.pk else None)]:
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def _login(self, password='correct horse'):
+        return self._post('/api/login/', {'email': 'ana@example.com', 'password': password})
+
+    def _refresh(self, token):
+        return self._post('/api/token/refresh/', {'refresh': token})
+
+    def _me(self, access):
+        return self.client.get('/api/me/', headers={'Authorization': f'Bearer {access}'})
+
+    def test_login_and_me(self):
+        self.assertEqual(self._login('wrong').status_code, 401)
+
+        tokens = self._login().json()
+        self.assertEqual(tokens['token_type'], 'Bearer')
+        self.assertEqual(tokens['expires_in'], 900)
+        self.assertEqual(self._me(tokens['access']).json(), {'id': 7, 'email': 'ana@example.com'})
+
+    def test_refresh_token_is_single_use(self):
+        refresh = self._login().json()['refresh']
+
+        renewed = self._refresh(refresh)
+        self.assertEqual(renewed.status_code, 200)
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+        self.assertEqual(self._me(renewed.json()['access']).status_code, 200)
+        self.assertEqual(self._refresh(renewed.json()['refresh']).status_code, 200)
+
+    def test_password_change_ends_the_session(self):
+        refresh = self._login().json()['refresh']
+        self.user.set_password('battery staple')
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    def test_deactivated_user_cannot_refresh(self):
+        refresh = self._login().json()['refresh']
+        self.user.is_active = False
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    def test_logout_revokes_the_refresh_token(self):
+        refresh = self._login().json()['refresh']
+        self.assertEqual(self._post('/api/logout/', {'refresh': refresh}).status_code, 200)
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    def test_me_rejects_expired_and_forged_tokens(self):
+        access = self._login().json()['access']
+        later = time.time() + 901
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertEqual(self._me(access).status_code, 401)
+
+        self.assertEqual(self._me(access[:-2] + 'xx').status_code, 401)
+        self.assertEqual(self._me(self._login().json()['refresh']).status_code, 401)
+        self.assertEqual(self.client.get('/api/me/').status_code, 401)
@@ -0,0 +1,103 @@
+import secrets
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from forelast_backend.shared_cache import cache_pop
+
+ACCESS_SALT = 'forelast.auth.access'
+REFRESH_SALT = 'forelast.auth.refresh'
+
+
+def _refresh_key(jti):
+    return f'refresh_token:{jti}'
+
+
+def password_fingerprint(user):
+    """Short HMAC of the password hash; changes whenever the password does"""
+    return salted_hmac(REFRESH_SALT, user.password).hexdigest()[:16]
+
+
+def issue_tokens(user):
+    """Return a new access/refresh pair for a user who has just authenticated
+
+    The access token is verified from its signature alone. The refresh
+    token's id is kept in the shared cache so each one can be used once.
+    """
+    access = signing.dumps({'uid': user.pk, 'sub': user.get_username()}, salt=ACCESS_SALT, compress=True)
+
+    jti = secrets.token_urlsafe(16)
+    cache.set(_refresh_key(jti), user.pk, timeout=settings.AUTH_REFRESH_TOKEN_TTL)
+    refresh = signing.dumps({'uid': user.pk, 'jti': jti, 'pwd': password_fingerprint(user)}, salt=REFRESH_SALT)
+
+    return {
+        'access': access,
+        'refresh': refresh,
+        'token_type': 'Bearer',
+        'expires_in': settings.AUTH_ACCESS_TOKEN_TTL,
+    }
+
+
+def verify_access_token(token):
+    """Return the token's claims, or None if it is forged, malformed or expired"""
+    try:
+        return signing.loads(token, salt=ACCESS_SALT, max_age=settings.AUTH_ACCESS_TOKEN_TTL)
+    except signing.BadSignature:
+        return None
+
+
+def redeem_refresh_token(token, get_user):
+    """Use up a refresh token and return its user, or None if it is no longer valid
+
+    ``get_user(uid)`` loads the user; a refresh is the only token operation
+    that touches the database, so a deactivated account or a changed
+    password ends the session at the next renewal.
+    """
+    try:
+        claims = signing.loads(token, salt=REFRESH_SALT, max_age=settings.AUTH_REFRESH_TOKEN_TTL)
+    except signing.BadSignature:
+        return None
+
+    # Taken out atomically, so a replayed token loses the race
+    if cache_pop(cache, _refresh_key(claims['jti'])) != claims['uid']:
+        return None
+
+    user = get_user(claims['uid'])
+    if user is None or not user.is_active:
+        return None
+    if not constant_time_compare(claims['pwd'], password_fingerprint(user)):
+        return None
+    return user
+
+
+def revoke_refresh_token(token):
+    try:
+        claims = signing.loads(token, salt=REFRESH_SALT, max_age=settings.AUTH_REFRESH_TOKEN_TTL)
+    except signing.BadSignature:
+        return False
+    return cache.delete(_refresh_key(claims['jti']))
+
+
+def get_token_claims(request):
+    """Claims of the request's ``Authorization: Bearer`` access token, or None"""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    return verify_access_token(token.strip())
+
+
+def token_required(view):
+    """Reject requests without a valid access token; sets request.token_claims"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        claims = get_token_claims(request)
+        if claims is None:
+            return JsonResponse({ 'detail': 'Invalid or expired token' }, status=401)
+        request.token_claims = claims
+        return view(request, *args, **kwargs)
+    return wrapper
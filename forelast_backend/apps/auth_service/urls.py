@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import login_view, register_view
+from .views import login_view, register_view, refresh_view, logout_view, me_view
 
 urlpatterns = [
     path('login/', login_view),
-    path('register/', register_view)
+    path('register/', register_view),
+    path('token/refresh/', refresh_view),
+    path('logout/', logout_view),
+    path('me/', me_view)
 ]
@@ -1,7 +1,8 @@
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from .tokens import issue_tokens, redeem_refresh_token, revoke_refresh_token, token_required
 import json
 
 User = get_user_model()
@@ -21,17 +22,62 @@ def login_view(request):
         if not email or not password:
             return JsonResponse({ 'detail': 'Email and password are required' }, status=400)
 
-        # Check if email exists
-        if not User.objects.filter(username=email).exists():
+        # One query loads the user; the password is then checked against that row
+        user = User.objects.filter(username=email).first()
+        if user is None:
             return JsonResponse({ 'detail': 'Email not found' }, status=404)
 
-        # Authenticate user
-        user = authenticate(request, username=email, password=password)
-
-        if user is not None:
-            return JsonResponse({ 'message': 'Login successful' }, status=200)
-        else:
+        if not user.check_password(password) or not user.is_active:
             return JsonResponse({ 'detail': 'Incorrect password' }, status=401)
+
+        return JsonResponse({ 'message': 'Login successful', **issue_tokens(user) }, status=200)
+    return JsonResponse({ 'detail': 'Method not allowed' }, status=405)
+
+
+def _get_user(uid):
+    return User.objects.filter(pk=uid).first()
+
+
+@csrf_exempt
+def refresh_view(request):
+    """Trade a refresh token for a new access/refresh pair (the old refresh token is used up)"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({ 'detail': 'Invalid JSON format' }, status=400)
+
+        token = data.get('refresh')
+        if not token:
+            return JsonResponse({ 'detail': 'Refresh token is required' }, status=400)
+
+        user = redeem_refresh_token(token, _get_user)
+        if user is None:
+            return JsonResponse({ 'detail': 'Invalid or expired refresh token' }, status=401)
+
+        return JsonResponse(issue_tokens(user), status=200)
+    return JsonResponse({ 'detail': 'Method not allowed' }, status=405)
+
+
+@csrf_exempt
+def logout_view(request):
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({ 'detail': 'Invalid JSON format' }, status=400)
+
+        if data.get('refresh'):
+            revoke_refresh_token(data['refresh'])
+        return JsonResponse({ 'message': 'Logged out' }, status=200)
+    return JsonResponse({ 'detail': 'Method not allowed' }, status=405)
+
+
+@token_required
+def me_view(request):
+    """Who the access token belongs to, answered from the token without a database query"""
+    if request.method == 'GET':
+        return JsonResponse({ 'id': request.token_claims['uid'], 'email': request.token_claims['sub'] }, status=200)
     return JsonResponse({ 'detail': 'Method not allowed' }, status=405)
 # Register
 @csrf_exempt
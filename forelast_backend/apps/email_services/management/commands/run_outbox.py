@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...outbox import get_outbox_stats, get_worker
+
+
+class Command(BaseCommand):
+    help = "Send queued email in the foreground (use with EMAIL_OUTBOX_WORKER=False on the web workers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        worker = get_worker(start=False)
+        if not options['once']:
+            self.stdout.write(f"Draining the email outbox ({get_outbox_stats()['depth']} pending)")
+            try:
+                worker.run()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                worker.pool.close()
+            return
+
+        started = time.perf_counter()
+        while worker.drain_once():
+            pass
+        worker.pool.close()
+        stats = worker.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats['sent']} in {time.perf_counter() - started:.2f}s "
+            f"({stats['retried']} to retry, {stats['failed']} given up, {get_outbox_stats()['depth']} still pending)"
+        ))
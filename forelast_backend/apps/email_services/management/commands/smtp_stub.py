@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from ...smtp_stub import make_smtp_stub
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP stand-in that accepts and discards mail"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--delay-ms', type=int, default=50, help='Delay added to every delivery')
+
+    def handle(self, *args, **options):
+        server = make_smtp_stub(options['host'], options['port'], delay=options['delay_ms'] / 1000)
+        self.stdout.write(
+            f"SMTP stub on {options['host']}:{options['port']} "
+            f"(set EMAIL_HOST/EMAIL_PORT, or EMAIL_OTP_HOST/EMAIL_OTP_PORT, to this with TLS off)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Received {len(server.messages)} messages over {server.connections} connections")
@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from forelast_backend.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed batch is reserved before another worker may retry it
+CLAIM_LEASE_SECONDS = 120
+
+# Recent deliveries the latency percentiles are taken from
+LATENCY_WINDOW = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def smtp_accounts():
+    """Connection settings for each sending account
+
+    ``default`` is Django's EMAIL_* configuration; ``otp`` is the separate
+    mailbox the password-reset codes are sent from.
+    """
+    return {
+        'default': {},
+        'otp': {
+            'host': settings.EMAIL_OTP_HOST,
+            'port': settings.EMAIL_OTP_PORT,
+            'username': settings.EMAIL_OTP,
+            'password': settings.EMAIL_OTP_PASSWORD,
+            'use_tls': settings.EMAIL_OTP_USE_TLS,
+        },
+    }
+
+
+class Outbox:
+    """Durable mail queue in a SQLite file shared by every worker process
+
+    Rows are claimed with a lease inside an immediate transaction, so several
+    processes can drain the same file without sending a message twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread, and never one inherited across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def put(self, account, message):
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO outbox (account, message, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+            (account, json.dumps(message, ensure_ascii=False), now, now),
+        )
+        return cursor.lastrowid
+
+    def claim(self, limit, lease=CLAIM_LEASE_SECONDS):
+        """Reserve up to ``limit`` due messages and return them oldest first"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, account, message, attempts, created_at FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? AND claimed_until <= ? "
+                "ORDER BY id LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET claimed_until = ? WHERE id = ?",
+                [(now + lease, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {'id': row[0], 'account': row[1], 'message': json.loads(row[2]), 'attempts': row[3], 'created_at': row[4]}
+            for row in rows
+        ]
+
+    def delete(self, ids):
+        self._connect().executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def retry_later(self, item, error, delay, give_up=False):
+        self._connect().execute(
+            "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, claimed_until = 0, "
+            "last_error = ?, status = ? WHERE id = ?",
+            (time.time() + delay, str(error)[:500], 'failed' if give_up else 'pending', item['id']),
+        )
+
+    def counts(self):
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*), MIN(created_at) FROM outbox GROUP BY status"
+        ).fetchall()
+        return {status: (count, oldest) for status, count, oldest in rows}
+
+
+class SmtpPool:
+    """One open SMTP connection per account, kept for as long as the worker lives
+
+    A connection idle for longer than the server is likely to keep it is
+    closed and reopened before the next send.
+    """
+
+    def __init__(self):
+        self._connections = {}
+
+    def get(self, account):
+        entry = self._connections.get(account)
+        if entry is not None and time.monotonic() - entry[1] > settings.EMAIL_SMTP_IDLE_TIMEOUT:
+            self.drop(account)
+            entry = None
+        if entry is None:
+            connection = get_connection(
+                fail_silently=False, timeout=settings.EMAIL_SMTP_TIMEOUT, **smtp_accounts()[account]
+            )
+            connection.open()
+            entry = [connection, time.monotonic()]
+            self._connections[account] = entry
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def drop(self, account):
+        entry = self._connections.pop(account, None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+    def close(self):
+        for account in list(self._connections):
+            self.drop(account)
+
+
+class OutboxWorker:
+    """Drains the outbox in batches over pooled SMTP connections"""
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+        self.pool = SmtpPool()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self._lock = threading.Lock()
+        self._queue_latency = deque(maxlen=LATENCY_WINDOW)
+        self._send_latency = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0, 'reconnects': 0}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='email-outbox', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.clear()
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {str(e)}")
+            self.wakeup.wait(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+
+    def drain_once(self):
+        """Send one batch; return how many messages were claimed"""
+        batch = self.outbox.claim(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        if not batch:
+            return 0
+
+        sent = []
+        for item in batch:
+            try:
+                self._send(item)
+            except Exception as e:
+                self._failed(item, e)
+                continue
+            sent.append(item['id'])
+            now = time.time()
+            with self._lock:
+                self._stats['sent'] += 1
+                self._queue_latency.append(now - item['created_at'])
+
+        self.outbox.delete(sent)
+        with self._lock:
+            self._stats['batches'] += 1
+        return len(batch)
+
+    def _send(self, item):
+        data = item['message']
+        started = time.perf_counter()
+        for attempt in range(2):
+            connection = self.pool.get(item['account'])
+            message = EmailMessage(
+                data['subject'], data['body'], data['from_email'], data['to'], connection=connection
+            )
+            try:
+                with track_upstream('smtp', item['account']):
+                    message.send(fail_silently=False)
+                break
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the long-lived connection; reconnect once and resend
+                self.pool.drop(item['account'])
+                with self._lock:
+                    self._stats['reconnects'] += 1
+                if attempt:
+                    raise
+        with self._lock:
+            self._send_latency.append(time.perf_counter() - started)
+
+    def _failed(self, item, error):
+        if isinstance(error, (smtplib.SMTPException, OSError)) and not isinstance(error, smtplib.SMTPResponseException):
+            # Connection-level failure: start the next message on a fresh connection
+            self.pool.drop(item['account'])
+
+        attempts = item['attempts'] + 1
+        give_up = attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS or _is_permanent(error)
+        # Exponential backoff with jitter so a struggling relay is not hit in lockstep
+        delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        self.outbox.retry_later(item, error, delay, give_up=give_up)
+        with self._lock:
+            self._stats['failed' if give_up else 'retried'] += 1
+
+        if give_up:
+            logger.error(f"Giving up on email {item['id']} after {attempts} attempts: {str(error)}")
+        else:
+            logger.warning(f"Email {item['id']} failed ({str(error)}), retrying in {delay:.1f}s")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            queue_latency = sorted(self._queue_latency)
+            send_latency = sorted(self._send_latency)
+        stats['queue_latency_ms'] = _percentiles(queue_latency)
+        stats['send_latency_ms'] = _percentiles(send_latency)
+        stats['running'] = self.thread is not None and self.thread.is_alive()
+        return stats
+
+
+def _is_permanent(error):
+    """5xx replies and refused recipients will fail the same way on every retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    return {
+        'p50': round(values[len(values) // 2] * 1000, 1),
+        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+        'max': round(values[-1] * 1000, 1),
+    }
+
+
+_lock = threading.Lock()
+_outbox = None
+_worker = None
+_worker_pid = None
+
+
+def get_outbox():
+    global _outbox
+    if _outbox is None:
+        with _lock:
+            if _outbox is None:
+                _outbox = Outbox(settings.EMAIL_OUTBOX_PATH)
+    return _outbox
+
+
+def get_worker(start=None):
+    """Return this process's outbox worker, starting its thread if enabled"""
+    global _worker, _worker_pid
+
+    start = settings.EMAIL_OUTBOX_WORKER if start is None else start
+    pid = os.getpid()
+    if _worker is None or _worker_pid != pid:
+        # Fetched before taking the lock, which get_outbox() needs as well
+        outbox = get_outbox()
+        with _lock:
+            # Threads do not survive a fork, so each process runs its own worker
+            if _worker is None or _worker_pid != pid:
+                _worker = OutboxWorker(outbox)
+                _worker_pid = pid
+                if start:
+                    _worker.start()
+    return _worker
+
+
+def queue_email(subject, body, from_email, to, account='default'):
+    """Store a message in the outbox and return its id without waiting for SMTP"""
+    message_id = get_outbox().put(account, {
+        'subject': subject, 'body': body, 'from_email': from_email, 'to': list(to),
+    })
+    get_worker().wakeup.set()
+    return message_id
+
+
+def get_outbox_stats():
+    counts = get_outbox().counts()
+    pending, oldest = counts.get('pending', (0, None))
+    stats = {
+        'depth': pending,
+        'dead': counts.get('failed', (0, None))[0],
+        'oldest_pending_s': round(time.time() - oldest, 1) if oldest else None,
+        'pid': os.getpid(),
+    }
+    if _worker is not None and _worker_pid == os.getpid():
+        stats['worker'] = _worker.stats()
+    return stats
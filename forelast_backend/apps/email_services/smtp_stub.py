@@ -0,0 +1,92 @@
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+
+
+class SmtpStubHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for Django's backend and keeps what it receives"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+        self.wfile.flush()
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 forelast-smtp-stub ready")
+        envelope = {}
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.reply("250-forelast-smtp-stub")
+                self.reply("250 8BITMIME")
+            elif verb == 'HELO':
+                self.reply("250 forelast-smtp-stub")
+            elif verb == 'MAIL':
+                envelope = {'from': command[10:].strip('<> '), 'to': []}
+                self.reply("250 OK")
+            elif verb == 'RCPT':
+                envelope.setdefault('to', []).append(command[8:].strip('<> '))
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                time.sleep(server.delay)
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self.reply("451 Temporary failure, try again later")
+                    continue
+                with server.lock:
+                    server.messages.append({**envelope, 'message': message_from_bytes(data)})
+                self.reply("250 OK: queued")
+            elif verb in ('RSET', 'NOOP'):
+                self.reply("250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+
+class SmtpStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_smtp_stub(host='127.0.0.1', port=0, delay=0.05):
+    """Create (but do not start) a stub SMTP server; port 0 picks a free port
+
+    ``delay`` is added to every DATA command to stand in for a real relay.
+    Set ``fail_next`` to have that many deliveries rejected with a 451.
+    """
+    server = SmtpStubServer((host, port), SmtpStubHandler)
+    server.delay = delay
+    server.fail_next = 0
+    server.messages = []
+    server.connections = 0
+    server.lock = threading.Lock()
+    return server
+
+
+def start_smtp_stub(**kwargs):
+    """Start a stub SMTP server on a background thread and return it with its (host, port)"""
+    server = make_smtp_stub(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[:2]
@@ -0,0 +1,111 @@
+import io
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+
+from . import outbox
+from .smtp_stub import start_smtp_stub
+
+
+class OutboxWorkerTests(SimpleTestCase):
+    def setUp(self):
+        self.smtp, (host, port) = start_smtp_stub(delay=0)
+        self.addCleanup(self.smtp.shutdown)
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=host, EMAIL_PORT=port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            EMAIL_OUTBOX_PATH=f'{self.tmp}/outbox.sqlite3',
+            EMAIL_OUTBOX_WORKER=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Start from a process that has not touched the outbox yet
+        self._reset()
+        self.addCleanup(self._reset)
+
+    @staticmethod
+    def _reset():
+        # A fresh lock too, so one deadlocked test cannot hang the rest
+        outbox._lock = threading.Lock()
+        outbox._outbox = None
+        outbox._worker = None
+        outbox._worker_pid = None
+
+    def _call_with_timeout(self, func, timeout=5):
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault('value', func()), daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), f"call did not return within {timeout}s")
+        return result.get('value')
+
+    def test_get_worker_in_fresh_process(self):
+        worker = self._call_with_timeout(lambda: outbox.get_worker(start=False))
+        self.assertIsInstance(worker, outbox.OutboxWorker)
+        self.assertIs(worker.outbox, outbox.get_outbox())
+
+    def test_run_outbox_once_sends_queued_mail(self):
+        # Queued by another process, so run_outbox starts with nothing set up
+        outbox.Outbox(f'{self.tmp}/outbox.sqlite3').put('default', {
+            'subject': 'Hello', 'body': 'Queued before the worker existed',
+            'from_email': 'noreply@forelast.test', 'to': ['user@forelast.test'],
+        })
+
+        stdout = io.StringIO()
+        self._call_with_timeout(lambda: call_command('run_outbox', '--once', stdout=stdout))
+
+        self.assertIn('Sent 1', stdout.getvalue())
+        self.assertEqual(len(self.smtp.messages), 1)
+        self.assertEqual(self.smtp.messages[0]['message']['Subject'], 'Hello')
+        self.assertEqual(outbox.get_outbox_stats()['depth'], 0)
+
+
+class VerifyOtpTests(SimpleTestCase):
+    email = 'user@forelast.test'
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'forelast_backend.shared_cache.SQLiteCache',
+            'LOCATION': f'{self.tmp}/cache.sqlite3',
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _store(self, otp):
+        cache.set(f'otp_{self.email}', (otp, time.time() + 300), timeout=300)
+
+    def _verify(self, otp, client=None):
+        return (client or self.client).post('/api/verify-otp/', {'email': self.email, 'otp': otp}).status_code
+
+    def test_wrong_guess_keeps_the_code(self):
+        self._store('123456')
+        self.assertEqual(self._verify('000000'), 400)
+        self.assertEqual(self._verify('123456'), 200)
+
+    def test_code_works_once(self):
+        self._store('123456')
+        self.assertEqual(self._verify('123456'), 200)
+        self.assertEqual(self._verify('123456'), 400)
+
+    def test_wrong_guesses_racing_the_right_code(self):
+        for _ in range(50):
+            self._store('123456')
+            guesses = [threading.Thread(target=lambda: self._verify('000000', Client())) for _ in range(8)]
+            for thread in guesses:
+                thread.start()
+            status = self._verify('123456', Client())
+            for thread in guesses:
+                thread.join()
+            self.assertEqual(status, 200)
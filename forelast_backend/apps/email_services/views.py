@@ -1,10 +1,13 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import send_mail, EmailMessage, get_connection
 from django.core.cache import cache
 from django.contrib.auth.models import User
+from django.utils.crypto import constant_time_compare
+from forelast_backend.shared_cache import cache_pop
+from .outbox import queue_email
 import random
 import os
+import time
 import traceback
 
 @csrf_exempt
@@ -21,13 +24,8 @@ def send_suggestion(request):
             full_message = f"Suggestion received:\n\n{message}"
             from_email = os.getenv('EMAIL_HOST_USER')
 
-            send_mail(
-                subject,
-                full_message,
-                from_email,
-                ['forelastlstm@gmail.com'],
-                fail_silently=False,
-            )
+            # Delivered by the outbox worker so the request does not wait on SMTP
+            queue_email(subject, full_message, from_email, ['forelastlstm@gmail.com'])
 
             return JsonResponse({ 'status': 'success' })
 
@@ -62,13 +60,7 @@ def submit_feedback(request):
             subject = "New User Feedback"
             from_email = os.getenv('EMAIL_HOST_USER')
 
-            send_mail(
-                subject,
-                feedback,
-                from_email,
-                ['forelastlstm@gmail.com'],
-                fail_silently=False,
-            )
+            queue_email(subject, feedback, from_email, ['forelastlstm@gmail.com'])
 
             return JsonResponse({ 'status': 'success' })
 
@@ -97,29 +89,15 @@ def forgot_password(request):
                 return JsonResponse({ 'status': 'success', 'message': 'If this email exists, an OTP will be sent.' }, status=200)
 
             otp = str(random.randint(100000, 999999))
-            cache.set(f'otp_{email}', otp, timeout=300)  # Valid for 5 minutes
+            # Stored in the shared cache so any worker can verify it
+            cache.set(f'otp_{email}', (otp, time.time() + 300), timeout=300)  # Valid for 5 minutes
 
             subject = 'Your OTP Code'
             message = f'Your OTP code is: {otp}'
             from_email = os.getenv('EMAIL_OTP')
 
-            # Setting up the email connection using the app password
-            connection = get_connection(
-                host='smtp.gmail.com',
-                port=587,
-                username=from_email,
-                password=os.getenv('EMAIL_OTP_PASSWORD'),  # The app password here
-                use_tls=True
-            )
-
-            email_message = EmailMessage(
-                subject,
-                message,
-                from_email,
-                [email],
-                connection=connection
-            )
-            email_message.send(fail_silently=False)
+            # Sent from the OTP mailbox over the worker's pooled connection
+            queue_email(subject, message, from_email, [email], account='otp')
 
             return JsonResponse({ 'status': 'success', 'message': 'OTP sent to your email.' })
 
@@ -140,14 +118,18 @@ def verify_otp(request):
             if not email or not otp_input:
                 return JsonResponse({ 'status': 'error', 'message': 'Email and OTP are required.' }, status=400)
 
-            cached_otp = cache.get(f'otp_{email}')
-            print(f"DEBUG: cached_otp = {cached_otp}")
-
-            if cached_otp != otp_input:
+            # Compare first: a wrong guess never touches the stored OTP
+            stored = cache.get(f'otp_{email}')
+            if stored is None or not constant_time_compare(stored[0], otp_input):
                 return JsonResponse({ 'status': 'error', 'message': 'Invalid or expired OTP.' }, status=400)
 
-            # Optionally, clear OTP after successful verification
-            cache.delete(f'otp_{email}')
+            # Right code: take it out atomically, so only one request can use it
+            taken = cache_pop(cache, f'otp_{email}')
+            if taken != stored:
+                if taken is not None and taken[1] > time.time():
+                    # A new OTP was sent in between; keep that one for its own check
+                    cache.add(f'otp_{email}', taken, timeout=taken[1] - time.time())
+                return JsonResponse({ 'status': 'error', 'message': 'Invalid or expired OTP.' }, status=400)
 
             return JsonResponse({ 'status': 'success', 'message': 'OTP verified successfully.' })
 
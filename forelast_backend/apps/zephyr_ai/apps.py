@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class ZephyrAiConfig(AppConfig):
+    name = 'forelast_backend.apps.zephyr_ai'
+
+    def ready(self):
+        # The model is loaded lazily on the first chat message unless preloading is on
+        if settings.ZEPHYR_PRELOAD_NLP:
+            from .utils import preload
+            preload()
@@ -0,0 +1,178 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from forelast_backend.metrics import record_cache
+from forelast_backend.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_cache = TTLCache(
+    max_entries=settings.ZEPHYR_COMPLETION_CACHE_MAX_ENTRIES,
+    ttl=settings.ZEPHYR_COMPLETION_CACHE_TTL,
+)
+_file_lock = threading.Lock()
+_loaded = False
+
+_saver_lock = threading.Lock()
+_saver_pid = None
+_dirty = threading.Event()
+
+
+def normalize_message(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r"\s+", " ", str(text or "").lower()).strip()
+    return text.rstrip("?!. ")
+
+
+def completion_key(user_message, local_response, chat_history):
+    """Key a reply on the normalized message, the knowledge-base hit and the recent turns"""
+    turns = settings.ZEPHYR_COMPLETION_CACHE_HISTORY_TURNS
+    recent = chat_history[-turns:] if turns else []
+    payload = json.dumps([
+        normalize_message(user_message),
+        local_response,
+        [[turn.get("role"), normalize_message(turn.get("content"))] for turn in recent if isinstance(turn, dict)],
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _read_entries(path):
+    """Return the [key, value, expires_at] entries in the persisted file"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_from_disk():
+    """Fill the cache from the persisted file once per process"""
+    global _loaded
+
+    path = settings.ZEPHYR_COMPLETION_CACHE_FILE
+    with _file_lock:
+        if _loaded:
+            return
+        _loaded = True
+        if not path:
+            return
+
+        try:
+            entries = _read_entries(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read completion cache {path}: {str(e)}")
+            return
+
+    now = time.time()
+    for key, value, expires_at in entries:
+        if expires_at > now:
+            _cache.set(key, value, ttl=expires_at - now)
+    if entries:
+        logger.info(f"Loaded {len(entries)} cached completions from {path}")
+
+
+def _save_to_disk(merge=True):
+    """Write the cache to its file, keeping entries other processes saved unless merge is off"""
+    path = settings.ZEPHYR_COMPLETION_CACHE_FILE
+    if not path:
+        return
+
+    now = time.time()
+    entries = {key: [key, value, now + remaining] for key, value, remaining, _ in _cache.items()}
+    tmp_path = None
+    try:
+        with _file_lock:
+            if merge:
+                try:
+                    for key, value, expires_at in _read_entries(path):
+                        if expires_at > now:
+                            entries.setdefault(key, [key, value, expires_at])
+                except ValueError:
+                    pass
+            newest = sorted(entries.values(), key=lambda entry: entry[2])[-settings.ZEPHYR_COMPLETION_CACHE_MAX_ENTRIES:]
+
+            # A temp file unique to this write, renamed over the old one, so neither a
+            # crash nor another process saving at the same time leaves a broken file
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=os.path.dirname(os.path.abspath(path)),
+                prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False,
+            ) as f:
+                tmp_path = f.name
+                json.dump(newest, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            tmp_path = None
+    except OSError as e:
+        logger.warning(f"Could not write completion cache {path}: {str(e)}")
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _save_loop(dirty):
+    while True:
+        dirty.wait()
+        # Let a burst of new replies settle into a single write
+        time.sleep(settings.ZEPHYR_COMPLETION_CACHE_SAVE_DELAY)
+        dirty.clear()
+        _save_to_disk()
+
+
+def _schedule_save():
+    """Mark the cache as changed; this process's saver thread writes it shortly after"""
+    global _dirty, _saver_pid
+
+    if not settings.ZEPHYR_COMPLETION_CACHE_FILE:
+        return
+    pid = os.getpid()
+    if _saver_pid != pid:
+        with _saver_lock:
+            # Threads do not survive a fork, so each process starts its own saver
+            if _saver_pid != pid:
+                _dirty = threading.Event()
+                threading.Thread(target=_save_loop, args=(_dirty,), name="completion-cache-save", daemon=True).start()
+                _saver_pid = pid
+    _dirty.set()
+
+
+@atexit.register
+def _flush_on_exit():
+    if _saver_pid == os.getpid() and _dirty.is_set():
+        _save_to_disk()
+
+
+def get_cached_completion(key):
+    """Return a cached reply, or None"""
+    if not _loaded:
+        _load_from_disk()
+    reply = _cache.get(key)
+    record_cache('zephyr_completions', reply is not None)
+    return reply
+
+
+def set_cached_completion(key, reply):
+    _cache.set(key, reply)
+    _schedule_save()
+
+
+def clear_completion_cache():
+    _cache.clear()
+    _save_to_disk(merge=False)
+
+
+def get_completion_cache_stats():
+    """Hit rate and size of this process's completion cache"""
+    stats = _cache.stats()
+    stats['ttl'] = _cache.ttl
+    stats['persisted'] = bool(settings.ZEPHYR_COMPLETION_CACHE_FILE)
+    return stats
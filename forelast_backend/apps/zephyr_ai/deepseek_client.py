@@ -0,0 +1,181 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from forelast_backend.metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+
+# Statuses that mean DeepSeek is struggling rather than rejecting the request
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling DeepSeek while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Stop calling an upstream after repeated failures, then probe it again
+
+    After ``threshold`` consecutive failures the circuit opens and calls fail
+    immediately. Once ``reset_timeout`` has passed a single trial call is let
+    through; success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'failures': 0, 'short_circuited': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Return whether a call may go out now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            self._stats['short_circuited'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial_running:
+                    self._stats['opened'] += 1
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self.state
+            stats['consecutive_failures'] = self.failures
+        return stats
+
+
+breaker = CircuitBreaker(
+    threshold=settings.DEEPSEEK_BREAKER_THRESHOLD,
+    reset_timeout=settings.DEEPSEEK_BREAKER_RESET,
+)
+
+
+def deepseek_headers():
+    return {
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+def _build_session():
+    session = requests.Session()
+    # Retries are done by post_completion so they can back off with jitter
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.DEEPSEEK_POOL_SIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(deepseek_headers())
+    return session
+
+
+def get_deepseek_session():
+    """Return the process-wide keep-alive session for DeepSeek"""
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            # Rebuild after a fork so workers never share the parent's sockets
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _backoff(attempt):
+    # Full jitter: anywhere between zero and the exponential cap
+    return random.uniform(0, settings.DEEPSEEK_RETRY_BACKOFF * (2 ** attempt))
+
+
+def post_completion(payload, stream=False):
+    """POST a chat completion with deadlines, jittered retries and the circuit breaker
+
+    Returns the response once its headers arrive (the body may still be
+    streaming). Raises a requests.RequestException, including
+    CircuitOpenError, when DeepSeek cannot be used.
+    """
+    if not breaker.allow():
+        raise CircuitOpenError('DeepSeek circuit is open')
+
+    timeout = (settings.DEEPSEEK_CONNECT_TIMEOUT, settings.DEEPSEEK_READ_TIMEOUT)
+    try:
+        response = _post_with_retries(payload, stream, timeout)
+    except BaseException:
+        # Whatever went wrong, count it so a half-open trial always gives its slot back
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return response
+
+
+def _post_with_retries(payload, stream, timeout):
+    attempt = 0
+    while True:
+        try:
+            # Timed to the response headers; a streamed body is read by the caller
+            with track_upstream('deepseek', 'chat_stream' if stream else 'chat'):
+                response = get_deepseek_session().post(
+                    settings.DEEPSEEK_API_URL, json=payload, timeout=timeout, stream=stream
+                )
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error = requests.HTTPError(f"DeepSeek returned {response.status_code}", response=response)
+            response.close()
+        except requests.ConnectionError as e:
+            error = e
+        # A requests.Timeout is not retried: a read deadline already cost the full
+        # budget, and retrying would double the tail
+
+        if attempt >= settings.DEEPSEEK_RETRIES:
+            raise error
+
+        attempt += 1
+        logger.warning(f"DeepSeek request failed ({str(error)}), retry {attempt} of {settings.DEEPSEEK_RETRIES}")
+        time.sleep(_backoff(attempt))
+
+
+def get_deepseek_stats():
+    return {'circuit': breaker.stats(), 'pid': os.getpid()}
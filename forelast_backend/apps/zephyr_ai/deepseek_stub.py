@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "FORELAST is a weather forecasting website for the National Capital Region. "
+    "It uses an LSTM neural network trained on historical observations. "
+    "Ask me about any NCR city to see its forecast."
+)
+
+
+class DeepSeekStubHandler(BaseHTTPRequestHandler):
+    """Answers /v1/chat/completions like DeepSeek, with a fixed reply and simulated latency"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        tokens = [word + ' ' for word in self.server.reply.split(' ')]
+        time.sleep(self.server.first_token_delay)
+
+        if not payload.get('stream'):
+            time.sleep(self.server.token_delay * (len(tokens) - 1))
+            body = json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": self.server.reply}}]
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # Chunked like the real API, one SSE event per chunk
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.server.token_delay)
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (e.g. a blocked reply), like a real API would see
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(host='127.0.0.1', port=0, first_token_delay=0.5, token_delay=0.03, reply=DEFAULT_REPLY):
+    """Create (but do not start) a stub server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), DeepSeekStubHandler)
+    server.daemon_threads = True
+    server.first_token_delay = first_token_delay
+    server.token_delay = token_delay
+    server.reply = reply
+    return server
+
+
+def start_stub_server(**kwargs):
+    """Start a stub server on a background thread and return it with its completions URL"""
+    server = make_stub_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1/chat/completions"
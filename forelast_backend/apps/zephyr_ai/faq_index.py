@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "faq.faiss"
+META_FILE = "faq.json"
+
+# Below this size an exact flat scan is already sub-millisecond
+IVF_MIN_ENTRIES = 4096
+
+
+def iter_faq_entries(knowledge_base):
+    """Flatten the knowledge base into {category, question, answer} entries"""
+    for category, data in knowledge_base.items():
+        for question, answer in zip(data["questions"], data["answers"]):
+            yield {"category": category, "question": question, "answer": answer}
+
+
+def fingerprint(entries, model_name):
+    """Hash of the entries and model, used to spot an index built from an older knowledge base"""
+    payload = json.dumps([model_name, entries], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def embed_entries(nlp, entries):
+    """Return a (entries x dims) float32 matrix of unit question vectors
+
+    Questions without a vector stay as zero rows and never match.
+    """
+    vectors = np.array(
+        [doc.vector for doc in nlp.pipe(entry["question"] for entry in entries)],
+        dtype=np.float32,
+    ).reshape(len(entries), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class FaqIndex:
+    """Inner-product faiss index over unit question vectors plus the entry for each row"""
+
+    def __init__(self, index, entries, meta):
+        self.index = index
+        self.entries = entries
+        self.meta = meta
+
+    @classmethod
+    def load(cls, index_dir, nprobe=8):
+        """Open a built index memory-mapped, so workers share its pages"""
+        with open(os.path.join(index_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = faiss.read_index(
+            os.path.join(index_dir, INDEX_FILE),
+            faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+        )
+        if hasattr(index, "nprobe"):
+            index.nprobe = nprobe
+        return cls(index, meta.pop("entries"), meta)
+
+    def search(self, query, k=3):
+        """Return the k closest entries to a unit query vector, best first"""
+        scores, ids = self.index.search(query.reshape(1, -1).astype(np.float32), k)
+        return [
+            {**self.entries[i], "score": float(score)}
+            for score, i in zip(scores[0], ids[0])
+            if i >= 0
+        ]
+
+    def search_many(self, queries, k=1):
+        """search() for every row of a (queries x dims) matrix in one call"""
+        scores, ids = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+        return [
+            [{**self.entries[i], "score": float(score)} for score, i in zip(row_scores, row_ids) if i >= 0]
+            for row_scores, row_ids in zip(scores, ids)
+        ]
+
+
+class MatrixFaqIndex:
+    """In-memory fallback with the same interface, used when no built index is available"""
+
+    def __init__(self, vectors, entries):
+        self.vectors = vectors
+        self.entries = entries
+        self.meta = {"count": len(entries), "index_type": "in-memory"}
+
+    def search(self, query, k=3):
+        if not self.entries:
+            return []
+        scores = self.vectors @ query
+        # Stable sort keeps the first entry on ties, like a linear scan would
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [{**self.entries[i], "score": float(scores[i])} for i in top]
+
+    def search_many(self, queries, k=1):
+        if not self.entries:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.vectors.T
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return [
+            [{**self.entries[i], "score": float(row_scores[i])} for i in row_top]
+            for row_scores, row_top in zip(scores, top)
+        ]
+
+
+def build_faq_index(nlp, knowledge_base, index_dir, model_name):
+    """Embed the knowledge base and write the index and its metadata to index_dir
+
+    Files are written under temporary names and swapped in, so a running
+    server never opens a half-written index.
+    """
+    entries = list(iter_faq_entries(knowledge_base))
+    vectors = embed_entries(nlp, entries)
+    dims = vectors.shape[1]
+
+    if len(entries) >= IVF_MIN_ENTRIES:
+        nlist = int(np.sqrt(len(entries)))
+        index = faiss.index_factory(dims, f"IVF{nlist},Flat", faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index_type = f"IVF{nlist},Flat"
+    else:
+        index = faiss.IndexFlatIP(dims)
+        index_type = "Flat"
+    index.add(vectors)
+
+    meta = {
+        "model": model_name,
+        "dims": dims,
+        "count": len(entries),
+        "index_type": index_type,
+        "fingerprint": fingerprint(entries, model_name),
+    }
+
+    os.makedirs(index_dir, exist_ok=True)
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    meta_path = os.path.join(index_dir, META_FILE)
+    faiss.write_index(index, index_path + ".tmp")
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({**meta, "entries": entries}, f, ensure_ascii=False)
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+    logger.info(f"Built {index_type} FAQ index with {len(entries)} entries in {index_dir}")
+    return meta
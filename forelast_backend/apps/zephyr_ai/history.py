@@ -0,0 +1,132 @@
+import math
+import re
+import threading
+
+from django.conf import settings
+
+# Roles a client may send; anything else (e.g. an injected "system" turn) is dropped
+HISTORY_ROLES = ('user', 'assistant')
+
+# Per-message overhead of the chat format, on top of the content itself
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Longest excerpt of an old question kept in the summary
+SUMMARY_EXCERPT_CHARS = 60
+
+_lock = threading.Lock()
+_stats = {'requests': 0, 'turns_received': 0, 'turns_sent': 0, 'turns_summarized': 0,
+          'turns_dropped': 0, 'tokens_received': 0, 'tokens_sent': 0}
+
+
+def estimate_tokens(text):
+    """Rough token count for English chat text (about four characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(message):
+    return estimate_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+
+
+def clean_history(chat_history):
+    """Keep well-formed user/assistant turns with non-empty text"""
+    if not isinstance(chat_history, list):
+        return []
+    turns = []
+    for turn in chat_history:
+        if not isinstance(turn, dict) or turn.get('role') not in HISTORY_ROLES:
+            continue
+        content = turn.get('content')
+        if isinstance(content, str) and content.strip():
+            turns.append({'role': turn['role'], 'content': content.strip()})
+    return turns
+
+
+def _truncate(message, tokens):
+    chars = max(0, (tokens - MESSAGE_OVERHEAD_TOKENS) * 4)
+    return {'role': message['role'], 'content': message['content'][-chars:]}
+
+
+def summarize_turns(turns, budget):
+    """One short message listing what the user asked earlier, within budget tokens
+
+    Returns (message, number of questions it covers); the message is None
+    when not even the latest question fits.
+    """
+    prefix = "Earlier in this conversation the user asked about: "
+    excerpts = []
+    for turn in reversed(turns):
+        if turn['role'] != 'user':
+            continue
+        excerpt = re.sub(r"\s+", " ", turn['content'])
+        if len(excerpt) > SUMMARY_EXCERPT_CHARS:
+            excerpt = excerpt[:SUMMARY_EXCERPT_CHARS].rsplit(' ', 1)[0] + '...'
+        candidate = {'role': 'system', 'content': prefix + '; '.join([excerpt] + excerpts)}
+        if message_tokens(candidate) > budget:
+            break
+        excerpts.insert(0, excerpt)
+
+    if not excerpts:
+        return None, 0
+    return {'role': 'system', 'content': prefix + '; '.join(excerpts)}, len(excerpts)
+
+
+def compact_history(chat_history, budget=None, summary_budget=None):
+    """Fit the chat history into a token budget before it is sent to DeepSeek
+
+    The most recent turns are kept verbatim, newest first, until the budget
+    is used up. Older user questions are folded into one summary message and
+    older assistant replies are dropped. Returns (messages, report).
+    """
+    budget = settings.ZEPHYR_HISTORY_TOKEN_BUDGET if budget is None else budget
+    summary_budget = settings.ZEPHYR_HISTORY_SUMMARY_TOKENS if summary_budget is None else summary_budget
+
+    turns = clean_history(chat_history)
+    received = sum(message_tokens(turn) for turn in turns)
+
+    if received <= budget:
+        recent, older = turns, []
+    else:
+        recent_budget = max(budget - summary_budget, 0)
+        recent = []
+        used = 0
+        for turn in reversed(turns):
+            cost = message_tokens(turn)
+            if used + cost > recent_budget:
+                if not recent and recent_budget > MESSAGE_OVERHEAD_TOKENS:
+                    # The last turn alone is too long: keep its tail
+                    recent.append(_truncate(turn, recent_budget))
+                break
+            recent.insert(0, turn)
+            used += cost
+        older = turns[:len(turns) - len(recent)]
+
+    messages = list(recent)
+    summary, summarized = summarize_turns(older, budget - sum(message_tokens(turn) for turn in recent))
+    if summary:
+        messages.insert(0, summary)
+
+    report = {
+        'history_tokens': sum(message_tokens(message) for message in messages),
+        'turns_sent': len(recent),
+        'turns_summarized': summarized,
+        'turns_dropped': len(older) - summarized,
+    }
+
+    with _lock:
+        _stats['requests'] += 1
+        _stats['turns_received'] += len(turns)
+        _stats['turns_sent'] += len(recent)
+        _stats['turns_summarized'] += summarized
+        _stats['turns_dropped'] += report['turns_dropped']
+        _stats['tokens_received'] += received
+        _stats['tokens_sent'] += report['history_tokens']
+
+    return messages, report
+
+
+def get_history_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats['token_budget'] = settings.ZEPHYR_HISTORY_TOKEN_BUDGET
+    stats['tokens_saved'] = stats['tokens_received'] - stats['tokens_sent']
+    return stats
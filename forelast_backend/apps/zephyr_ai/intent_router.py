@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+
+from .completion_cache import normalize_message
+from .utils import zephyr_data, search_faq
+
+# Knowledge-base score above which the entry is passed to DeepSeek as a hint
+HINT_THRESHOLD = 0.75
+
+# Routes that answer without calling DeepSeek
+LOCAL_ROUTES = ('weather', 'greeting', 'faq', 'cached')
+
+# How many recent requests per route the latency percentiles are taken from
+LATENCY_WINDOW = 512
+
+Intent = namedtuple('Intent', ['name', 'confidence', 'answer', 'direct', 'local_response'])
+
+
+def _greeting_phrases():
+    questions = zephyr_data["knowledge_base"].get("greetings", {}).get("questions", [])
+    return {normalize_message(question) for question in questions}
+
+
+_GREETINGS = _greeting_phrases()
+
+
+def classify_message(user_message):
+    """Score a chat message against the local intents
+
+    Returns an Intent whose ``direct`` flag says the answer is confident
+    enough to send without DeepSeek. ``local_response`` is what process_message
+    would have returned, for use as the DeepSeek hint otherwise.
+    """
+    matches = search_faq(user_message, k=1)
+    return route_match(user_message, matches[0] if matches else None)
+
+
+def route_match(user_message, top):
+    """Build the Intent for a message from its best knowledge-base match (or None)"""
+    fallback = zephyr_data["response_logic"]["fallback_response"]
+    local_response = top["answer"] if top and top["score"] > HINT_THRESHOLD else fallback
+
+    if normalize_message(user_message) in _GREETINGS:
+        # "hi", "good morning": the exact phrase, whatever the vectors say
+        answer = top["answer"] if top and top["category"] == "greetings" else zephyr_data["persona"]["introduction"]
+        return Intent('greeting', 1.0, answer, True, local_response)
+
+    if top is None:
+        return Intent('fallback', 0.0, None, False, local_response)
+
+    confidence = round(float(top["score"]), 4)
+    if top["category"] == "greetings":
+        direct = confidence >= settings.ZEPHYR_ROUTER_GREETING_THRESHOLD
+        return Intent('greeting', confidence, top["answer"], direct, local_response)
+
+    # Only categories with complete answers; the weather and activity entries are templates
+    direct = (
+        top["category"] in settings.ZEPHYR_ROUTER_DIRECT_CATEGORIES
+        and confidence >= settings.ZEPHYR_ROUTER_FAQ_THRESHOLD
+    )
+    name = 'faq' if confidence > HINT_THRESHOLD else 'fallback'
+    return Intent(name, confidence, top["answer"], direct, local_response)
+
+
+class RouteStats:
+    """Per-route request counts, latency percentiles and intent confidence"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._latency = defaultdict(lambda: deque(maxlen=self.window))
+        self._confidence = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, route, started, confidence=None):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counts[route] += 1
+            self._latency[route].append(elapsed)
+            if confidence is not None:
+                self._confidence[route].append(confidence)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+            self._latency.clear()
+            self._confidence.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            latency = {route: sorted(values) for route, values in self._latency.items()}
+            confidence = {route: list(values) for route, values in self._confidence.items()}
+
+        routes = {}
+        for route, count in counts.items():
+            values = latency[route]
+            routes[route] = {
+                'count': count,
+                'p50_ms': round(values[len(values) // 2] * 1000, 2),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+            if confidence.get(route):
+                routes[route]['avg_confidence'] = round(sum(confidence[route]) / len(confidence[route]), 4)
+
+        total = sum(counts.values())
+        avoided = sum(counts.get(route, 0) for route in LOCAL_ROUTES)
+        return {
+            'routes': routes,
+            'requests': total,
+            'upstream_avoided': avoided,
+            'avoided_rate': round(avoided / total, 4) if total else 0.0,
+            'pid': os.getpid(),
+        }
+
+
+route_stats = RouteStats()
+
+
+def record_route(route, started, confidence=None):
+    route_stats.record(route, started, confidence)
+
+
+def get_route_stats():
+    stats = route_stats.stats()
+    stats['thresholds'] = {
+        'faq': settings.ZEPHYR_ROUTER_FAQ_THRESHOLD,
+        'greeting': settings.ZEPHYR_ROUTER_GREETING_THRESHOLD,
+    }
+    return stats
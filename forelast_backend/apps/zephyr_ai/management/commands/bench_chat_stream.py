@@ -0,0 +1,58 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from ...deepseek_stub import start_stub_server
+
+
+class Command(BaseCommand):
+    help = "Compare time-to-first-token of the streaming and buffered chat endpoints against a local stub"
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests', type=int, default=10)
+        parser.add_argument('--first-token-ms', type=int, default=500)
+        parser.add_argument('--token-ms', type=int, default=30)
+
+    def handle(self, *args, **options):
+        server, url = start_stub_server(
+            first_token_delay=options['first_token_ms'] / 1000,
+            token_delay=options['token_ms'] / 1000,
+        )
+        client = Client()
+        results = {'chat': [], 'chat/stream': []}
+
+        with override_settings(DEEPSEEK_API_URL=url, ALLOWED_HOSTS=['*']):
+            # Warm up the spaCy model so it does not count against the first request
+            self._post(client, 'chat', 'warm up')
+
+            for i in range(options['requests']):
+                for endpoint in results:
+                    # A distinct message per request keeps the completion cache out of the numbers
+                    results[endpoint].append(self._post(client, endpoint, f"benchmark question {endpoint} {i}"))
+
+        server.shutdown()
+        for endpoint, timings in results.items():
+            first = [t[0] * 1000 for t in timings]
+            total = [t[1] * 1000 for t in timings]
+            self.stdout.write(
+                f"{endpoint:12} first byte p50 {statistics.median(first):7.1f} ms   "
+                f"complete p50 {statistics.median(total):7.1f} ms"
+            )
+
+    def _post(self, client, endpoint, message):
+        started = time.perf_counter()
+        response = client.post(
+            f'/api/zephyr/{endpoint}/', data=json.dumps({'message': message}), content_type='application/json'
+        )
+        if not response.streaming:
+            elapsed = time.perf_counter() - started
+            return elapsed, elapsed
+
+        first = None
+        for chunk in response.streaming_content:
+            if first is None and chunk.startswith(b'event: token'):
+                first = time.perf_counter() - started
+        return first, time.perf_counter() - started
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...faq_index import build_faq_index, faiss
+from ...utils import SPACY_MODEL, get_nlp, zephyr_data
+
+
+class Command(BaseCommand):
+    help = "Rebuild Zephyr's FAQ vector index from the knowledge base"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.ZEPHYR_FAQ_INDEX_DIR,
+            help='Directory to write the index to (default: ZEPHYR_FAQ_INDEX_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        if faiss is None:
+            raise CommandError('faiss-cpu is not installed')
+
+        started = time.perf_counter()
+        meta = build_faq_index(
+            get_nlp(), zephyr_data.get("knowledge_base", {}), options['output'], SPACY_MODEL
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {meta['count']} questions ({meta['index_type']}, {meta['dims']} dims) "
+            f"into {options['output']} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ...deepseek_stub import make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the DeepSeek chat completions API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--first-token-ms', type=int, default=500, help='Delay before the first token')
+        parser.add_argument('--token-ms', type=int, default=30, help='Delay between tokens')
+
+    def handle(self, *args, **options):
+        server = make_stub_server(
+            options['host'], options['port'],
+            first_token_delay=options['first_token_ms'] / 1000,
+            token_delay=options['token_ms'] / 1000,
+        )
+        self.stdout.write(
+            f"DeepSeek stub on http://{options['host']}:{options['port']}/v1/chat/completions "
+            f"(set DEEPSEEK_API_URL to this)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ...intent_router import route_match
+from ...utils import get_kb_index, get_nlp
+from ...views import is_weather_query
+
+FIELDS = ['question', 'route', 'intent', 'category', 'matched_question', 'score']
+
+
+def iter_questions(f):
+    """Yield questions from plain text (one per line) or JSON lines with a "message" field"""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('{'):
+            record = json.loads(line)
+            line = record.get('message') or record.get('question') or ''
+        if line:
+            yield line
+
+
+def iter_chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_chunk(nlp, index, questions, n_process, batch_size):
+    """Embed a chunk with nlp.pipe and match every question in one index search"""
+    docs = nlp.pipe(questions, n_process=n_process, batch_size=batch_size)
+    vectors = np.array([doc.vector for doc in docs], dtype=np.float32).reshape(len(questions), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    matches = index.search_many(vectors, k=1)
+
+    rows = []
+    for question, norm, found in zip(questions, norms[:, 0], matches):
+        # Questions with no known words have no vector, like search_faq returns nothing
+        top = found[0] if found and norm > 0 else None
+        intent = route_match(question, top)
+        if is_weather_query(question):
+            route = 'weather'
+        elif intent.direct:
+            route = intent.name
+        else:
+            route = 'deepseek'
+        rows.append({
+            'question': question,
+            'route': route,
+            'intent': intent.name,
+            'category': top['category'] if top else '',
+            'matched_question': top['question'] if top else '',
+            'score': round(intent.confidence, 4),
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Score logged user questions against the knowledge base and report the route each would take"
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Text file with one question per line, or JSON lines ("-" for stdin)')
+        parser.add_argument('-o', '--output', default='-', help='Where to write results (.csv or .jsonl, default stdout as CSV)')
+        # Zephyr's pipeline only looks up word vectors, which is cheaper than shipping
+        # docs between processes; extra workers pay off once real components are enabled
+        parser.add_argument('--n-process', type=int, default=1, help='spaCy worker processes for nlp.pipe')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Texts per nlp.pipe batch')
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='Questions embedded and scored together; bounds memory on large files')
+
+    def handle(self, *args, **options):
+        if options['input'] != '-' and not os.path.exists(options['input']):
+            raise CommandError(f"No such file: {options['input']}")
+
+        nlp = get_nlp()
+        index = get_kb_index()
+        source = sys.stdin if options['input'] == '-' else open(options['input'], encoding='utf-8')
+        output = options['output']
+        sink = self.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+        as_json = output.endswith('.jsonl')
+        writer = None if as_json else csv.DictWriter(sink, fieldnames=FIELDS)
+        if writer:
+            writer.writeheader()
+
+        routes = {}
+        total = 0
+        started = time.perf_counter()
+        try:
+            for questions in iter_chunks(iter_questions(source), options['chunk_size']):
+                for row in score_chunk(nlp, index, questions, options['n_process'], options['batch_size']):
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        sink.write(json.dumps(row, ensure_ascii=False) + '\n')
+                    routes[row['route']] = routes.get(row['route'], 0) + 1
+                total += len(questions)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if sink is not self.stdout:
+                sink.close()
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        summary = ', '.join(f"{route} {count}" for route, count in sorted(routes.items()))
+        self.stderr.write(
+            f"Scored {total} questions in {elapsed:.2f}s ({rate:,.0f}/s, n_process={options['n_process']}): {summary}"
+        )
@@ -0,0 +1,188 @@
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+import json
+import logging
+import requests
+import time
+from .utils import zephyr_data
+from .completion_cache import completion_key, get_cached_completion, set_cached_completion
+from .views import (
+    BLOCKED_TERMS, BLOCKED_REPLY,
+    validate_response, build_chat_payload, handle_weather_query
+)
+from .deepseek_client import post_completion
+from .intent_router import classify_message, record_route
+from .history import compact_history
+
+logger = logging.getLogger(__name__)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accepts ``Accept: text/event-stream``; only error bodies are rendered through it"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode('utf-8')
+
+
+class StreamValidator:
+    """Apply validate_response to a reply that arrives in pieces
+
+    The tail of the text is held back until it can no longer be the start of
+    a blocked term, so a term split across chunks is caught before any of it
+    is sent. Once a term is seen the whole reply is blocked.
+    """
+
+    def __init__(self, terms=BLOCKED_TERMS):
+        self.terms = [term.lower() for term in terms]
+        self.holdback = max(len(term) for term in self.terms) - 1
+        self.text = ''
+        self.sent = 0
+        self.blocked = False
+
+    def feed(self, chunk):
+        """Add a chunk and return the text that is now safe to send"""
+        self.text += chunk
+        lowered = self.text.lower()
+        if any(term in lowered for term in self.terms):
+            self.blocked = True
+            return ''
+
+        safe_until = max(self.sent, len(self.text) - self.holdback)
+        ready = self.text[self.sent:safe_until]
+        self.sent = safe_until
+        return ready
+
+    def finish(self):
+        """Return whatever is still held back once the reply is complete"""
+        if self.blocked:
+            return ''
+        ready = self.text[self.sent:]
+        self.sent = len(self.text)
+        return ready
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n".encode('utf-8')
+
+
+def iter_deepseek_deltas(response):
+    """Yield content deltas from an OpenAI-style streaming completion"""
+    # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        if delta:
+            yield delta
+
+
+def stream_deepseek_reply(local_response, chat_history, user_message, source, cache_key, started=None, confidence=None):
+    """Relay DeepSeek tokens as SSE events, filtering them on the way through"""
+    started = time.perf_counter() if started is None else started
+    validator = StreamValidator()
+    history, history_report = compact_history(chat_history)
+    payload = build_chat_payload(local_response, history, user_message, stream=True)
+    done = {'source': source, 'history_tokens': history_report['history_tokens']}
+
+    try:
+        with post_completion(payload, stream=True) as res:
+            res.raise_for_status()
+            for delta in iter_deepseek_deltas(res):
+                ready = validator.feed(delta)
+                if validator.blocked:
+                    break
+                if ready:
+                    yield sse_event('token', {'text': ready})
+
+    except (requests.RequestException, ValueError, LookupError) as e:
+        logger.warning(f"DeepSeek stream failed: {str(e)}")
+        record_route('deepseek_failed', started, confidence)
+        if not validator.sent:
+            yield sse_event('token', {'text': local_response})
+            yield sse_event('done', {'source': 'dictionary (DeepSeek failed)'})
+            return
+        yield sse_event('done', {**done, 'error': 'DeepSeek stream interrupted'})
+        return
+
+    record_route('deepseek', started, confidence)
+    if validator.blocked:
+        # Tell the client to drop what it has shown so far
+        yield sse_event('replace', {'text': BLOCKED_REPLY})
+        yield sse_event('done', done)
+        return
+
+    rest = validator.finish()
+    if rest:
+        yield sse_event('token', {'text': rest})
+    set_cached_completion(cache_key, validator.text)
+    yield sse_event('done', done)
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['POST'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def chat_stream_view(request):
+    """Same flow as chat_view, answered as server-sent events
+
+    Events: ``token`` ({text}) for each piece of the reply, ``replace``
+    ({text}) when the reply turns out to be blocked, and a final ``done``
+    ({source, history_tokens?, cached?, intent?, confidence?, weather_data?, structured_data?}).
+    """
+    user_message = request.data.get("message")
+    chat_history = request.data.get("history", [])
+
+    if not user_message:
+        return Response({"error": "No message provided"}, status=400)
+
+    started = time.perf_counter()
+    weather_response = handle_weather_query(user_message)
+    if weather_response and isinstance(weather_response, dict):
+        record_route('weather', started)
+        return event_stream_response(iter([
+            sse_event('token', {'text': weather_response.get('text', '')}),
+            sse_event('done', {
+                'source': 'weather_api',
+                'weather_data': True,
+                'structured_data': weather_response.get('data', {})
+            }),
+        ]))
+
+    intent = classify_message(user_message)
+    if intent.direct:
+        record_route(intent.name, started, intent.confidence)
+        return event_stream_response(iter([
+            sse_event('token', {'text': validate_response(intent.answer)}),
+            sse_event('done', {'source': 'dictionary', 'intent': intent.name, 'confidence': intent.confidence}),
+        ]))
+
+    safe_local_response = validate_response(intent.local_response)
+    source = "deepseek+dictionary" if safe_local_response != zephyr_data["response_logic"]["fallback_response"] else "deepseek"
+
+    cache_key = completion_key(user_message, safe_local_response, chat_history)
+    cached_reply = get_cached_completion(cache_key)
+    if cached_reply is not None:
+        record_route('cached', started, intent.confidence)
+        return event_stream_response(iter([
+            sse_event('token', {'text': cached_reply}),
+            sse_event('done', {'source': source, 'cached': True}),
+        ]))
+
+    return event_stream_response(
+        stream_deepseek_reply(
+            safe_local_response, chat_history, user_message, source, cache_key, started, intent.confidence
+        )
+    )
@@ -1,6 +1,7 @@
 from django.urls import path
-from forelast_backend.apps.zephyr_ai import views
+from forelast_backend.apps.zephyr_ai import views, streaming
 
 urlpatterns = [
     path('chat/', views.chat_view, name='chat_view'),
+    path('chat/stream/', streaming.chat_stream_view, name='chat_stream_view'),
 ]
\ No newline at end of file
@@ -1,7 +1,31 @@
-import spacy
-from spacy.matcher import PhraseMatcher
+import logging
+import os
+import threading
+import time
 
-nlp = spacy.load("en_core_web_md")
+from django.conf import settings
+
+from forelast_backend.metrics import track_upstream
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from .faq_index import (
+    META_FILE, FaqIndex, MatrixFaqIndex, embed_entries, faiss, fingerprint, iter_faq_entries
+)
+
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL = "en_core_web_md"
+# Similarity only uses the tokenizer and the static word vectors
+SPACY_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+_nlp_lock = threading.Lock()
+_nlp = None
+_kb_index = None
+_nlp_stats = {}
 
 zephyr_data = {
     "persona": {
@@ -100,27 +124,95 @@ zephyr_data = {
     }
 }
 
-def process_message(user_message):
-    user_input = nlp(user_message)
+def _rss_mb():
+    if psutil is None:
+        return None
+    return round(psutil.Process().memory_info().rss / 2**20, 1)
+
+
+def get_nlp():
+    """Return the spaCy pipeline, loading it on first use"""
+    global _nlp
+
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+
+                rss_before = _rss_mb()
+                started = time.perf_counter()
+                with track_upstream('spacy', 'load'):
+                    nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+                _nlp_stats.update({
+                    'loaded_by_pid': os.getpid(),
+                    'load_seconds': round(time.perf_counter() - started, 3),
+                    'rss_before_mb': rss_before,
+                    'rss_after_mb': _rss_mb(),
+                    'pipeline': nlp.pipe_names,
+                })
+                logger.info(f"Loaded {SPACY_MODEL} in {_nlp_stats['load_seconds']}s (RSS {rss_before} -> {_nlp_stats['rss_after_mb']} MB)")
+                _nlp = nlp
+    return _nlp
+
+
+def _load_kb_index():
     knowledge_base = zephyr_data.get("knowledge_base", {})
-    
-    best_score = 0.0
-    best_answer = None
-
-    for category, data in knowledge_base.items():
-        questions = data["questions"]
-        answers = data["answers"]
-        for i, question in enumerate(questions):
-            question_doc = nlp(question)
-            similarity = user_input.similarity(question_doc)
-            
-            if similarity > best_score and similarity > 0.75:  
-                best_score = similarity
-                best_answer = answers[i]
-
-    if best_answer:
-        return best_answer
-    else:
-        return zephyr_data["response_logic"]["fallback_response"]
+    entries = list(iter_faq_entries(knowledge_base))
+    index_dir = settings.ZEPHYR_FAQ_INDEX_DIR
+
+    if faiss is not None and os.path.exists(os.path.join(index_dir, META_FILE)):
+        try:
+            index = FaqIndex.load(index_dir, nprobe=settings.ZEPHYR_FAQ_NPROBE)
+            if index.meta["fingerprint"] == fingerprint(entries, SPACY_MODEL):
+                logger.info(f"Loaded {index.meta['index_type']} FAQ index with {index.meta['count']} entries")
+                return index
+            logger.warning("FAQ index was built from an older knowledge base, run build_faq_index; scanning in memory")
+        except Exception as e:
+            logger.warning(f"Could not load FAQ index from {index_dir}: {str(e)}")
 
+    return MatrixFaqIndex(embed_entries(get_nlp(), entries), entries)
 
+
+def get_kb_index():
+    """Return the knowledge-base index, loading the built one or embedding in memory"""
+    global _kb_index
+
+    if _kb_index is None:
+        index = _load_kb_index()
+        with _nlp_lock:
+            if _kb_index is None:
+                _kb_index = index
+    return _kb_index
+
+
+def search_faq(message, k=3):
+    """Return the k knowledge-base entries closest to a message, with cosine scores"""
+    nlp = get_nlp()
+    with track_upstream('spacy', 'embed'):
+        user_input = nlp(message)
+    if not user_input.vector_norm:
+        return []
+    return get_kb_index().search(user_input.vector / user_input.vector_norm, k)
+
+
+def preload():
+    """Load the model and knowledge-base index now
+
+    Call from the master process (e.g. gunicorn --preload) so forked
+    workers share the pages copy-on-write instead of each loading a copy.
+    """
+    get_kb_index()
+
+
+def get_nlp_stats():
+    """Report whether this process has loaded the model and what it cost"""
+    return {'loaded': _nlp is not None, 'pid': os.getpid(), **_nlp_stats, 'rss_mb': _rss_mb()}
+
+
+def process_message(user_message):
+    matches = search_faq(user_message, k=1)
+
+    if matches and matches[0]["score"] > 0.75:
+        return matches[0]["answer"]
+    else:
+        return zephyr_data["response_logic"]["fallback_response"]
@@ -1,21 +1,28 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .utils import zephyr_data, process_message
-import os
+from .utils import zephyr_data
+from .completion_cache import completion_key, get_cached_completion, set_cached_completion
+from .deepseek_client import post_completion
+from .intent_router import classify_message, record_route
+from .history import compact_history
 import requests
 import re
+import time
 from datetime import datetime, timedelta
-from supabase import create_client
 import logging
-from django.conf import settings
+from forelast_backend.supabase_client import get_supabase_client
+from forelast_backend.forecast_cache import get_forecast_row
+from forelast_backend.city_matcher import match_city
 
 logger = logging.getLogger(__name__)
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+
+BLOCKED_TERMS = ["competitor", "politics", "hate speech", "nsfw", "profanity"]
+BLOCKED_REPLY = "I can't discuss that topic."
+WEATHER_KEYWORDS = ['weather', 'temperature', 'forecast', 'humidity', 'rain', 'precipitation']
 
 def validate_response(text):
-    blocked_terms = ["competitor", "politics", "hate speech", "NSFW", "profanity"]
-    if any(term in text.lower() for term in blocked_terms):
-        return "I can't discuss that topic."
+    if any(term in text.lower() for term in BLOCKED_TERMS):
+        return BLOCKED_REPLY
     return text
 
 @api_view(['POST'])
@@ -26,9 +33,12 @@ def chat_view(request):
     if not user_message:
         return Response({"error": "No message provided"}, status=400)
 
+    started = time.perf_counter()
+
     # Check for weather-related queries
     weather_response = handle_weather_query(user_message)
     if weather_response and isinstance(weather_response, dict):
+        record_route('weather', started)
         return Response({
             "response": weather_response.get('text', ''),
             "source": "weather_api",
@@ -36,45 +46,73 @@ def chat_view(request):
             "structured_data": weather_response.get('data', {}) 
         })
 
-    # Normal chat processing
-    local_response = process_message(user_message)
-    safe_local_response = validate_response(local_response)
+    # Confident greetings and FAQ hits are answered locally without DeepSeek
+    intent = classify_message(user_message)
+    if intent.direct:
+        record_route(intent.name, started, intent.confidence)
+        return Response({
+            "response": validate_response(intent.answer),
+            "source": "dictionary",
+            "intent": intent.name,
+            "confidence": intent.confidence
+        })
 
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    # Normal chat processing
+    safe_local_response = validate_response(intent.local_response)
+    source = "deepseek+dictionary" if safe_local_response != zephyr_data["response_logic"]["fallback_response"] else "deepseek"
+
+    # Repeated questions are answered from the cache without a DeepSeek round trip
+    cache_key = completion_key(user_message, safe_local_response, chat_history)
+    cached_reply = get_cached_completion(cache_key)
+    if cached_reply is not None:
+        record_route('cached', started, intent.confidence)
+        return Response({
+            "response": cached_reply,
+            "source": source,
+            "cached": True
+        })
 
-    system_prompt = build_system_prompt(safe_local_response)
-    
-    payload = {
-        "model": "deepseek-chat",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            *chat_history,
-            {"role": "user", "content": user_message}
-        ],
-        "temperature": 1.2,
-        "max_tokens": 150
-    }
+    # Only the recent turns go out verbatim; older ones are summarized to stay within budget
+    history, history_report = compact_history(chat_history)
+    payload = build_chat_payload(safe_local_response, history, user_message)
 
     try:
-        res = requests.post("https://api.deepseek.com/v1/chat/completions", json=payload, headers=headers)
+        # Fails fast while DeepSeek is unhealthy, falling through to the local answer
+        res = post_completion(payload)
         res.raise_for_status()
         deepseek_reply = res.json()["choices"][0]["message"]["content"]
         safe_deepseek_reply = validate_response(deepseek_reply)
+        set_cached_completion(cache_key, safe_deepseek_reply)
+        record_route('deepseek', started, intent.confidence)
 
         return Response({
             "response": safe_deepseek_reply,
-            "source": "deepseek+dictionary" if safe_local_response != zephyr_data["response_logic"]["fallback_response"] else "deepseek"
+            "source": source,
+            "history_tokens": history_report["history_tokens"]
         })
 
     except requests.RequestException as e:
+        record_route('deepseek_failed', started, intent.confidence)
         return Response({
             "response": safe_local_response,
             "source": "dictionary (DeepSeek failed)"
         }, status=200)
 
+def build_chat_payload(local_response, chat_history, user_message, stream=False):
+    payload = {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "system", "content": build_system_prompt(local_response)},
+            *chat_history,
+            {"role": "user", "content": user_message}
+        ],
+        "temperature": 1.2,
+        "max_tokens": 150
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
 def build_system_prompt(local_response):
     prompt = (
         "You are Zephyr AI, an AI chatbot for FORELAST. Follow these rules strictly:\n"
@@ -88,9 +126,11 @@ def build_system_prompt(local_response):
         prompt += f"\nHere is some structured knowledge that may help you answer:\n\"{local_response}\"\n"
     return prompt
 
+def is_weather_query(user_message):
+    return any(keyword in user_message.lower() for keyword in WEATHER_KEYWORDS)
+
 def handle_weather_query(user_message):
-    weather_keywords = ['weather', 'temperature', 'forecast', 'humidity', 'rain', 'precipitation']
-    if not any(keyword in user_message.lower() for keyword in weather_keywords):
+    if not is_weather_query(user_message):
         return None
     
     cities = [
@@ -108,14 +148,13 @@ def handle_weather_query(user_message):
         }
     
     try:
-        supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        normalized_city = normalize_city_name(city)
-        
         # Default to current weather unless specifically asking for analytics
         if 'analytics' in user_message.lower() or 'statistics' in user_message.lower():
+            supabase = get_supabase_client()
+            normalized_city = normalize_city_name(city)
             return get_analytics_data(supabase, normalized_city, city)
         else:
-            return get_current_weather(supabase, normalized_city, city)
+            return get_current_weather(city)
             
     except Exception as e:
         logger.error(f"Weather API error for {city}: {str(e)}")
@@ -125,46 +164,20 @@ def handle_weather_query(user_message):
         }
 
 def extract_city_from_message(message, cities):
-    # Create a mapping of normalized city names to their original forms
-    city_mapping = {city.lower().replace('ñ', 'n'): city for city in cities}
-    
-    # Normalize the message for comparison
-    normalized_message = message.lower().replace('ñ', 'n')
-    
-    # Check for each possible city (normalized version)
-    for normalized_city, original_city in city_mapping.items():
-        if normalized_city in normalized_message:
-            return original_city
-    
-    # Try more flexible matching if direct match fails
-    for city in cities:
-        # Match city names with spaces replaced (e.g., "las pinas")
-        if city.lower().replace(' ', '').replace('ñ', 'n') in normalized_message.replace(' ', ''):
-            return city
-        # Match common abbreviations (e.g., "qc" for "quezon city")
-        if city.lower() == "quezon city" and " qc " in f" {normalized_message} ":
-            return city
-    
+    # One pass over the message against every city name and alias, then typo matching
+    match = match_city(message)
+    if match and match.city in cities:
+        return match.city
     return None
 
-def get_current_weather(supabase, normalized_city, city_name):
-    forecast_table = f"{normalized_city}_city_forecast"
-    today = datetime.now().date().strftime('%Y-%m-%d')
+def get_current_weather(city_name):
+    current_data = get_forecast_row(city_name)
     
-    response = supabase.table(forecast_table)\
-        .select("*")\
-        .eq('datetime', today)\
-        .order('datetime', desc=True)\
-        .limit(1)\
-        .execute()
-    
-    if not response.data:
+    if not current_data:
         return {
             'text': f"No weather data available for {city_name} today",
             'data': {'city': city_name, 'error': 'No data'}
         }
-        
-    current_data = response.data[0]
     
     weather_data = {
         'city': city_name,
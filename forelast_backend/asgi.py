@@ -3,6 +3,11 @@ ASGI config for forelast_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Set ASYNC_VIEWS=True to serve the weather read endpoints from async_views
+and run it under an ASGI server, e.g.
+
+    uvicorn forelast_backend.asgi:application --workers 2
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
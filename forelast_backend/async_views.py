@@ -0,0 +1,142 @@
+from django.http import JsonResponse, HttpResponse
+from django.utils.decorators import method_decorator
+from django.conf import settings
+import logging
+from .views import (
+    CurrentWeatherAPI, WeatherAnalyticsAPI, WeatherDataPreviewAPI, TopCitiesAPI, BatchWeatherAPI,
+    _parse_batch_request, _batch_errors, _parse_preview_request, _preview_page_query, _preview_count_query,
+    _preview_response
+)
+from .supabase_client import get_async_supabase_client
+from .top_cities import aget_top_cities
+from .forecast_cache import aget_forecast_row
+from .date_index import aget_date_index
+from .http_caching import conditional_data_response
+from .analytics_snapshots import (
+    aget_analytics_snapshot, abuild_analytics_snapshot, render_analytics_snapshot
+)
+from .batch_weather import current_weather_payload, afetch_batch, render_batch
+
+# Native async versions of the weather read endpoints. Upstream calls go
+# through the async PostgREST client, so under an ASGI server a request that
+# is waiting on Supabase holds no thread. Enabled with ASYNC_VIEWS=True.
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCurrentWeatherAPI(CurrentWeatherAPI):
+    """Async variant of CurrentWeatherAPI"""
+
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_CURRENT))
+    async def get(self, request, city):
+        try:
+            current_data = await aget_forecast_row(city)
+
+            if not current_data:
+                return JsonResponse(
+                    {'error': 'No forecast data available'},
+                    status=404
+                )
+
+            return JsonResponse(
+                current_weather_payload(city, current_data),
+                content_type="application/json"
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching current weather for {city}: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to fetch current weather', 'details': str(e)},
+                status=500
+            )
+
+
+class AsyncWeatherAnalyticsAPI(WeatherAnalyticsAPI):
+    """Async variant of WeatherAnalyticsAPI; a snapshot miss runs both queries concurrently"""
+
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_ANALYTICS))
+    async def get(self, request, city):
+        try:
+            body = await aget_analytics_snapshot(city)
+            if body is None:
+                body = await abuild_analytics_snapshot(city)
+
+            return HttpResponse(
+                render_analytics_snapshot(city, body),
+                content_type='application/json'
+            )
+
+        except Exception as e:
+            logger.error(f"Error processing request for {city}: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to fetch weather data', 'details': str(e)},
+                status=500
+            )
+
+
+class AsyncWeatherDataPreviewAPI(WeatherDataPreviewAPI):
+    """Async variant of WeatherDataPreviewAPI"""
+
+    async def get(self, request, city):
+        params, error = _parse_preview_request(request)
+        if error:
+            return error
+
+        try:
+            supabase = get_async_supabase_client()
+            rows = (await _preview_page_query(supabase, city, params).execute()).data
+            if not rows and not params['cursor']:
+                return _preview_response(rows, params, None)
+
+            index = await aget_date_index(city)
+            exact_count = None
+            if index is None:
+                exact_count = (await _preview_count_query(supabase, city, params).execute()).count
+            return _preview_response(rows, params, index, exact_count)
+
+        except Exception as e:
+            logger.error(f"Error previewing data for {city}: {str(e)}", exc_info=True)
+            return JsonResponse(
+                {'error': 'Failed to fetch preview data', 'details': str(e)},
+                status=500
+            )
+
+
+class AsyncTopCitiesAPI(TopCitiesAPI):
+    """Async variant of TopCitiesAPI; all cities are queried concurrently on the event loop"""
+
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_TOP_CITIES, per_city=False))
+    async def get(self, request):
+        try:
+            return JsonResponse(await aget_top_cities())
+
+        except Exception as e:
+            logger.error(f"Error fetching top cities: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to fetch top cities', 'details': str(e)},
+                status=500
+            )
+
+
+class AsyncBatchWeatherAPI(BatchWeatherAPI):
+    """Async variant of BatchWeatherAPI; every city and part is queried concurrently"""
+
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_CURRENT, per_city=False))
+    async def get(self, request):
+        cities, unknown, parts, error = _parse_batch_request(request)
+        if error:
+            return error
+
+        try:
+            results, errors = await afetch_batch(cities, parts)
+            return HttpResponse(
+                render_batch(cities, results, _batch_errors(errors, unknown)),
+                content_type='application/json'
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching batch weather data: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to fetch batch weather data', 'details': str(e)},
+                status=500
+            )
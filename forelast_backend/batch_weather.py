@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .analytics_snapshots import (
+    abuild_analytics_snapshot, aget_analytics_snapshot, build_analytics_snapshot,
+    get_analytics_snapshot, render_analytics_snapshot
+)
+from .cities import NCR_CITIES, normalize_city_name
+from .city_matcher import match_city
+from .forecast_cache import aget_forecast_row, get_forecast_row
+from .workers import get_executor
+
+logger = logging.getLogger(__name__)
+
+BATCH_PARTS = ('current', 'analytics')
+
+_CITIES_BY_KEY = {normalize_city_name(city): city for city in NCR_CITIES}
+
+
+def get_weather_condition(data):
+    """Determine weather condition based on weather data"""
+    temp = data.get('temp', 0)
+    precip = data.get('precip', 0)
+
+    if (temp >= 26 or temp <= 20) and precip > 50:
+        return 'Rainy'
+    elif temp > 27:
+        return 'Sunny'
+    elif temp > 23:
+        return 'Partly Cloudy'
+    else:
+        return 'Cloudy'
+
+
+def current_weather_payload(city, row):
+    """Shape a forecast row the way CurrentWeatherAPI returns it"""
+    return {
+        'city': city.title(),
+        'temperature': row.get('temp', '--'),
+        'weather_condition': get_weather_condition(row),
+        'humidity': row.get('humidity', '--'),
+        'precip': row.get('precip', 0),
+        'windspeed': row.get('windspeed', '--'),
+        'last_updated': datetime.now().isoformat()
+    }
+
+
+def resolve_cities(requested):
+    """Map requested names (or "all") onto NCR cities
+
+    Returns the known cities, deduplicated in request order, and the names
+    that did not match any city.
+    """
+    if any(name.lower() == 'all' for name in requested):
+        return list(NCR_CITIES), []
+
+    cities, unknown = [], []
+    for name in requested:
+        city = _CITIES_BY_KEY.get(normalize_city_name(name))
+        if city is None:
+            # Aliases such as "QC" or "BGC", but no typo guessing for explicit names
+            match = match_city(name, fuzzy=False)
+            city = match.city if match else None
+        if city is None:
+            unknown.append(name)
+        elif city not in cities:
+            cities.append(city)
+    return cities, unknown
+
+
+def _fetch_current(city):
+    row = get_forecast_row(city)
+    if not row:
+        raise LookupError('No forecast data available')
+    return current_weather_payload(city, row)
+
+
+def _fetch_analytics(city):
+    body = get_analytics_snapshot(city)
+    if body is None:
+        body = build_analytics_snapshot(city)
+    return body
+
+
+async def _afetch_current(city):
+    row = await aget_forecast_row(city)
+    if not row:
+        raise LookupError('No forecast data available')
+    return current_weather_payload(city, row)
+
+
+async def _afetch_analytics(city):
+    body = await aget_analytics_snapshot(city)
+    if body is None:
+        body = await abuild_analytics_snapshot(city)
+    return body
+
+
+def _collect(tasks, outcomes):
+    """Split (city, part) outcomes into per-city results and per-city errors"""
+    results = {}
+    errors = {}
+    for (city, part), outcome in zip(tasks, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Batch {part} failed for {city}: {str(outcome)}")
+            errors.setdefault(city, {})[part] = str(outcome) or outcome.__class__.__name__
+        else:
+            results.setdefault(city, {})[part] = outcome
+    return results, errors
+
+
+def fetch_batch(cities, parts=BATCH_PARTS):
+    """Fetch the requested parts for every city concurrently
+
+    Every (city, part) pair is its own task, so one slow or missing table
+    only fails its own entry.
+    """
+    fetchers = {'current': _fetch_current, 'analytics': _fetch_analytics}
+    executor = get_executor('batch-weather', settings.BATCH_WEATHER_WORKERS)
+
+    tasks = [(city, part) for city in cities for part in parts]
+    futures = [executor.submit(fetchers[part], city) for city, part in tasks]
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    return _collect(tasks, outcomes)
+
+
+async def afetch_batch(cities, parts=BATCH_PARTS):
+    """Async variant of fetch_batch with one task per (city, part) on the event loop"""
+    fetchers = {'current': _afetch_current, 'analytics': _afetch_analytics}
+
+    tasks = [(city, part) for city in cities for part in parts]
+    outcomes = await asyncio.gather(
+        *(fetchers[part](city) for city, part in tasks),
+        return_exceptions=True,
+    )
+    return _collect(tasks, outcomes)
+
+
+def render_batch(cities, results, errors):
+    """Serialize a batch response, splicing the stored analytics bytes in as-is"""
+    entries = []
+    for city in cities:
+        if city not in results:
+            continue
+        fields = []
+        if 'current' in results[city]:
+            fields.append(b'"current": ' + json.dumps(results[city]['current'], cls=DjangoJSONEncoder).encode('utf-8'))
+        if 'analytics' in results[city]:
+            fields.append(b'"analytics": ' + render_analytics_snapshot(city, results[city]['analytics']))
+        entries.append(json.dumps(city).encode('utf-8') + b': {' + b', '.join(fields) + b'}')
+
+    tail = json.dumps({'errors': errors, 'last_updated': datetime.now().isoformat()}).encode('utf-8')
+    return b'{"cities": {' + b', '.join(entries) + b'}, ' + tail[1:]
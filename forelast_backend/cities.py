@@ -0,0 +1,30 @@
+NCR_CITIES = [
+    'Caloocan', 'Las Piñas', 'Makati', 'Malabon', 'Mandaluyong',
+    'Manila', 'Marikina', 'Muntinlupa', 'Navotas', 'Parañaque',
+    'Pasay', 'Pasig', 'Pateros', 'Quezon City', 'San Juan',
+    'Taguig', 'Valenzuela'
+]
+
+
+def normalize_city_name(city):
+    """Normalize city name for table lookup"""
+    city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
+    special_cases = {
+        "las_piñas": "las_pinas",
+        "marikina": "markina",
+        "parañaque": "paranaque",
+        "caloocan": "caloocan",
+        "quezon_city": "quezon",
+        "manila": "manila"
+    }
+    return special_cases.get(city, city)
+
+
+def get_weather_table_name(city):
+    """Get table name for historical weather data"""
+    return f"{normalize_city_name(city)}_city_weather"
+
+
+def get_forecast_table_name(city):
+    """Get table name for forecast data"""
+    return f"{normalize_city_name(city)}_city_forecast"
@@ -0,0 +1,200 @@
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from .cities import NCR_CITIES, normalize_city_name
+
+# Common short forms, spellings and well-known barangays/districts for each city.
+# Places that straddle two cities (e.g. Baclaran, Addition Hills) are listed once
+# under the city most people mean, or left out when there is no clear answer.
+CITY_ALIASES = {
+    'Caloocan': ['kalookan', 'caloocan city', 'bagong silang', 'camarin', 'grace park', 'monumento', 'deparo'],
+    'Las Piñas': ['las pinas', 'pamplona', 'almanza', 'pulang lupa', 'manuyo'],
+    'Makati': ['makati city', 'bel-air', 'bel air', 'san lorenzo', 'legaspi village', 'salcedo village',
+               'forbes park', 'dasmarinas village', 'pio del pilar'],
+    'Malabon': ['potrero', 'tinajeros', 'tonsuya'],
+    'Mandaluyong': ['mandaluyong city', 'wack-wack', 'highway hills', 'plainview'],
+    'Manila': ['maynila', 'city of manila', 'tondo', 'sampaloc', 'ermita', 'malate', 'binondo', 'quiapo',
+               'intramuros', 'santa mesa', 'sta mesa', 'pandacan', 'san andres', 'sta cruz'],
+    'Marikina': ['marikina city', 'tumana', 'malanday', 'concepcion uno', 'marikina heights'],
+    'Muntinlupa': ['alabang', 'ayala alabang', 'tunasan', 'putatan', 'bayanan', 'poblacion muntinlupa'],
+    'Navotas': ['daanghari', 'sipac-almacen', 'north bay boulevard'],
+    'Parañaque': ['pque', 'paranaque', 'baclaran', 'bf homes', 'sucat', 'don bosco', 'san dionisio'],
+    'Pasay': ['pasay city', 'mall of asia', 'moa', 'naia', 'malibay', 'villamor'],
+    'Pasig': ['pasig city', 'ortigas', 'kapitolyo', 'manggahan', 'caniogan', 'santolan'],
+    'Pateros': ['martirez del 96'],
+    'Quezon City': ['qc', 'q.c.', 'quezon', 'kyusi', 'cubao', 'diliman', 'novaliches',
+                    'batasan hills', 'project 4', 'katipunan'],
+    'San Juan': ['san juan city', 'greenhills', 'little baguio', 'west crame', 'corazon de jesus', 'salapan'],
+    'Taguig': ['taguig city', 'bgc', 'bonifacio global city', 'fort bonifacio', 'western bicutan',
+               'lower bicutan', 'ususan', 'signal village'],
+    'Valenzuela': ['valenzuela city', 'malinta', 'karuhatan', 'marulas', 'dalandanan', 'paso de blas'],
+}
+
+# Barangays whose names are also everyday Tagalog/English/Spanish words ("parang",
+# "talon", "timog", "commonwealth") or common names. They only count after
+# "barangay"/"brgy", e.g. "brgy parang", never on their own or as a typo target.
+AMBIGUOUS_ALIASES = {
+    'Las Piñas': ['talon'],
+    'Makati': ['guadalupe', 'bangkal'],
+    'Malabon': ['catmon', 'longos'],
+    'Mandaluyong': ['hulo'],
+    'Manila': ['paco'],
+    'Marikina': ['parang', 'nangka', 'concepcion'],
+    'Muntinlupa': ['cupang'],
+    'Navotas': ['tangos', 'tanza'],
+    'Parañaque': ['tambo'],
+    'Pasay': ['libertad'],
+    'Pasig': ['rosario'],
+    'Pateros': ['aguho'],
+    'Quezon City': ['commonwealth', 'fairview', 'timog'],
+}
+BARANGAY_PREFIXES = ['barangay', 'brgy']
+
+# Phrases that contain a city name without meaning that city
+NOT_A_CITY = ['metro manila', 'manila bay']
+
+# Shortest token worth a fuzzy lookup, the Dice score a typo must reach, and how
+# many letters a typo may add or drop ("makaty" is Makati, "rosary" is not Rosario)
+FUZZY_MIN_LENGTH = 4
+FUZZY_THRESHOLD = 0.6
+FUZZY_MAX_LENGTH_DIFF = 1
+
+CityMatch = namedtuple('CityMatch', ['city', 'key', 'matched', 'score'])
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _fold(text):
+    """Lowercase and strip accents (ñ -> n) so spellings compare equal"""
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(_fold(text))
+
+
+def _trigrams(word):
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CityMatcher:
+    """Token trie over every city name and alias, with a trigram index for typos
+
+    Exact matching walks the trie from each token, so the cost depends on
+    the message length and the longest alias, not on how many aliases exist.
+    """
+
+    def __init__(self, aliases=CITY_ALIASES, ignored=NOT_A_CITY, ambiguous=AMBIGUOUS_ALIASES):
+        self.trie = {}
+        self.max_tokens = 1
+        self.grams = defaultdict(set)
+        self.words = {}
+        self.gram_counts = {}
+
+        for city in NCR_CITIES:
+            for phrase in [city] + aliases.get(city, []):
+                self._add(phrase, city)
+            for name in ambiguous.get(city, []):
+                for prefix in BARANGAY_PREFIXES:
+                    self._add(f"{prefix} {name}", city, fuzzy=False)
+        for phrase in ignored:
+            self._add(phrase, None)
+
+    def _add(self, phrase, city, fuzzy=True):
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        forms = [tokens]
+        if len(tokens) > 1:
+            # "laspinas", "quezoncity": people drop the space too
+            forms.append([''.join(tokens)])
+
+        for form in forms:
+            node = self.trie
+            for token in form:
+                node = node.setdefault(token, {})
+            node[None] = city
+            self.max_tokens = max(self.max_tokens, len(form))
+
+        # Only real one-word names are typo targets; a joined-up phrase like
+        # "highwayhills" would otherwise pull in "highway" on its own
+        if fuzzy and city is not None and len(tokens) == 1 and len(tokens[0]) >= FUZZY_MIN_LENGTH:
+            word = tokens[0]
+            grams = _trigrams(word)
+            self.words[word] = city
+            self.gram_counts[word] = len(grams)
+            for gram in grams:
+                self.grams[gram].add(word)
+
+    def _exact(self, tokens):
+        """Return the first, longest alias match and the tokens left for fuzzy matching"""
+        leftover = []
+        i = 0
+        while i < len(tokens):
+            node = self.trie
+            best = None
+            for j in range(i, min(i + self.max_tokens, len(tokens))):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    best = (j + 1, node[None])
+            if best is not None:
+                end, city = best
+                if city is not None:
+                    return CityMatch(city, normalize_city_name(city), ' '.join(tokens[i:end]), 1.0), leftover
+                # Skip past phrases like "metro manila" so their city word is not matched
+                i = end
+                continue
+            leftover.append(tokens[i])
+            i += 1
+        return None, leftover
+
+    def _fuzzy(self, tokens):
+        candidates = [token for token in tokens if len(token) >= FUZZY_MIN_LENGTH]
+        candidates += [a + b for a, b in zip(tokens, tokens[1:])]
+
+        best = None
+        for token in candidates:
+            grams = _trigrams(token)
+            shared = defaultdict(int)
+            for gram in grams:
+                for word in self.grams.get(gram, ()):
+                    shared[word] += 1
+            for word, count in shared.items():
+                if abs(len(word) - len(token)) > FUZZY_MAX_LENGTH_DIFF:
+                    continue
+                score = 2 * count / (len(grams) + self.gram_counts[word])
+                if score >= FUZZY_THRESHOLD and (best is None or score > best.score):
+                    city = self.words[word]
+                    best = CityMatch(city, normalize_city_name(city), token, round(score, 3))
+        return best
+
+    def match(self, text, fuzzy=True):
+        """Return the CityMatch for the first city named in text, or None"""
+        found, leftover = self._exact(tokenize(text))
+        if found is None and fuzzy:
+            found = self._fuzzy(leftover)
+        return found
+
+
+_matcher = None
+
+
+def get_city_matcher():
+    global _matcher
+    if _matcher is None:
+        _matcher = CityMatcher()
+    return _matcher
+
+
+def match_city(text, fuzzy=True):
+    """Find the NCR city a piece of text refers to
+
+    Returns a CityMatch whose ``key`` is the table key used by
+    get_weather_table_name/get_forecast_table_name, or None.
+    """
+    return get_city_matcher().match(text, fuzzy=fuzzy)
@@ -0,0 +1,155 @@
+import logging
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .cities import get_weather_table_name, normalize_city_name
+from .supabase_client import get_supabase_client
+from .weather_export import keyset_filter
+
+logger = logging.getLogger(__name__)
+
+
+class DateIndex:
+    """Prefix sums of row counts per day for one weather table
+
+    ``prefix[i]`` is the number of rows dated before ``base + i`` days, so
+    any date range is counted with two array lookups.
+    """
+
+    def __init__(self, base, prefix):
+        self.base = base
+        self.prefix = prefix
+
+    @classmethod
+    def from_dates(cls, dates):
+        if not dates:
+            return cls(None, np.zeros(1, dtype=np.int32))
+
+        ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+        base = int(ordinals.min())
+        per_day = np.bincount(ordinals - base)
+        prefix = np.zeros(len(per_day) + 1, dtype=np.int32)
+        np.cumsum(per_day, out=prefix[1:])
+        return cls(date.fromordinal(base), prefix)
+
+    @property
+    def total(self):
+        return int(self.prefix[-1])
+
+    @property
+    def last_day(self):
+        """Latest day the index counts rows for, or None when it is empty"""
+        if self.base is None:
+            return None
+        return date.fromordinal(self.base.toordinal() + len(self.prefix) - 2)
+
+    def with_tail(self, dates):
+        """Return a copy whose counts from last_day onward come from ``dates``
+
+        ``dates`` are the row dates on or after last_day, so rows added to the
+        last day and to any later days are counted without rescanning the rest.
+        """
+        last = self.last_day.toordinal()
+        ordinals = np.array([d.toordinal() for d in dates], dtype=np.int64)
+        per_day = np.bincount(ordinals - last) if len(ordinals) else np.zeros(1, dtype=np.int64)
+        tail = self.prefix[-2] + np.cumsum(per_day)
+        return DateIndex(self.base, np.concatenate([self.prefix[:-1], tail]).astype(np.int32))
+
+    def _position(self, ordinal):
+        # Clamp into the array so dates outside the table count nothing
+        return min(max(ordinal - self.base.toordinal(), 0), len(self.prefix) - 1)
+
+    def count(self, start_date, end_date):
+        """Number of rows dated between start_date and end_date, inclusive"""
+        if self.base is None or start_date > end_date:
+            return 0
+        start = self._position(start_date.toordinal())
+        end = self._position(end_date.toordinal() + 1)
+        return int(self.prefix[end] - self.prefix[start])
+
+
+def _index_key(city):
+    return f"date_index:{normalize_city_name(city)}"
+
+
+def _fetch_dates(city, since=None):
+    """Read the row dates of a weather table (from ``since`` on) with keyset pagination"""
+    supabase = get_supabase_client()
+    table_name = get_weather_table_name(city)
+    page_size = settings.DOWNLOAD_PAGE_SIZE
+    dates = []
+    last_row = None
+
+    while True:
+        query = supabase.table(table_name).select("datetime,id")
+        if since is not None:
+            query = query.gte('datetime', since.isoformat())
+        if last_row is not None:
+            query = query.or_(keyset_filter(last_row))
+
+        page = query.order('datetime').order('id').limit(page_size).execute().data
+        dates.extend(date.fromisoformat(str(row['datetime'])[:10]) for row in page)
+
+        if len(page) < page_size:
+            return dates
+        last_row = page[-1]
+
+
+def _store(city, index):
+    cache.set(_index_key(city), (index.base, index.prefix), timeout=settings.DATE_INDEX_TTL)
+
+
+def build_date_index(city):
+    """Scan a city's whole weather table and store its date index"""
+    index = DateIndex.from_dates(_fetch_dates(city))
+    _store(city, index)
+    logger.info(f"Built date index for {city} ({index.total} rows)")
+    return index
+
+
+def update_date_index(city):
+    """Bring a city's stored index up to date after new rows were ingested
+
+    Only rows from the last indexed day onward are read; the full scan is
+    left for cities that have no index yet. Backfilled rows older than the
+    last indexed day need build_date_index.
+    """
+    index = get_date_index(city)
+    if index is None or index.base is None:
+        return build_date_index(city)
+
+    index = index.with_tail(_fetch_dates(city, since=index.last_day))
+    _store(city, index)
+    return index
+
+
+def get_date_index(city):
+    """Return the stored date index for a city, or None if it has not been built
+
+    Never scans the table: requests that miss fall back to counting in Postgres,
+    and the observation refresh hook builds and maintains the index.
+    """
+    stored = cache.get(_index_key(city))
+    return None if stored is None else DateIndex(*stored)
+
+
+async def aget_date_index(city):
+    """Async get_date_index, so the shared-cache read does not block the event loop"""
+    stored = await cache.aget(_index_key(city))
+    return None if stored is None else DateIndex(*stored)
+
+
+def refresh_date_indexes(cities):
+    """Update indexes after ingestion; returns the cities that failed"""
+    failed = []
+    for city in cities:
+        try:
+            update_date_index(city)
+        except Exception as e:
+            logger.warning(f"Could not update date index for {city}: {str(e)}")
+            cache.delete(_index_key(city))
+            failed.append(city)
+    return failed
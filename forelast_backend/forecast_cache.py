@@ -0,0 +1,175 @@
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cities import get_forecast_table_name, normalize_city_name
+from .metrics import record_cache
+from .supabase_client import get_async_supabase_client, get_supabase_client
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_GENERATION_KEY = 'forecast_generation'
+
+_MISSING = object()
+
+_rows = TTLCache(
+    max_entries=settings.FORECAST_CACHE_MAX_ENTRIES,
+    ttl=settings.FORECAST_CACHE_TTL,
+)
+
+# Short-lived copy of the shared generations so a warm lookup stays in process
+_generations = TTLCache(
+    max_entries=settings.FORECAST_CACHE_MAX_ENTRIES,
+    ttl=settings.FORECAST_GENERATION_TTL,
+)
+
+
+def _city_generation_key(city):
+    return f"forecast_generation:{normalize_city_name(city)}"
+
+
+def _current_generation(city):
+    """Return the (global, per-city) generation pair readers must match
+
+    The pair is re-read from the shared cache at most every
+    FORECAST_GENERATION_TTL seconds per city.
+    """
+    generation = _generations.get(normalize_city_name(city))
+    if generation is None:
+        keys = [GLOBAL_GENERATION_KEY, _city_generation_key(city)]
+        generations = cache.get_many(keys)
+        generation = tuple(generations.get(key, 0) for key in keys)
+        _generations.set(normalize_city_name(city), generation)
+    return generation
+
+
+async def _acurrent_generation(city):
+    generation = _generations.get(normalize_city_name(city))
+    if generation is None:
+        keys = [GLOBAL_GENERATION_KEY, _city_generation_key(city)]
+        generations = await cache.aget_many(keys)
+        generation = tuple(generations.get(key, 0) for key in keys)
+        _generations.set(normalize_city_name(city), generation)
+    return generation
+
+
+def _bump(key):
+    # incr() is atomic in shared backends but raises when the key is absent
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def invalidate_forecasts(cities=None):
+    """Bump the generation so every reader drops rows cached before this write
+
+    Pass the cities whose forecasts were rewritten, or nothing to drop all of them.
+    """
+    if cities:
+        for city in cities:
+            _bump(_city_generation_key(city))
+            # This worker sees the write at once; the others within FORECAST_GENERATION_TTL
+            _generations.delete(normalize_city_name(city))
+    else:
+        _bump(GLOBAL_GENERATION_KEY)
+        _generations.clear()
+        _rows.clear()
+
+    logger.info(f"Invalidated cached forecasts for {', '.join(cities) if cities else 'all cities'}")
+
+
+def _shared_key(key, generation):
+    return f"forecast_row:{key[0]}:{key[1]}:{generation[0]}:{generation[1]}"
+
+
+def _cached_row(key, generation):
+    """Look in this process's cache, then the cache shared with the other workers"""
+    row = _rows.get(key, version=generation, default=_MISSING)
+    record_cache('forecast_rows', row is not _MISSING)
+    if row is _MISSING:
+        row = cache.get(_shared_key(key, generation), _MISSING)
+        record_cache('forecast_rows_shared', row is not _MISSING)
+        if row is not _MISSING:
+            _rows.set(key, row, version=generation)
+    return row
+
+
+async def _acached_row(key, generation):
+    row = _rows.get(key, version=generation, default=_MISSING)
+    record_cache('forecast_rows', row is not _MISSING)
+    if row is _MISSING:
+        row = await cache.aget(_shared_key(key, generation), _MISSING)
+        record_cache('forecast_rows_shared', row is not _MISSING)
+        if row is not _MISSING:
+            _rows.set(key, row, version=generation)
+    return row
+
+
+def _store_row(key, generation, row):
+    _rows.set(key, row, version=generation)
+    cache.set(_shared_key(key, generation), row, timeout=settings.FORECAST_CACHE_TTL)
+
+
+async def _astore_row(key, generation, row):
+    _rows.set(key, row, version=generation)
+    await cache.aset(_shared_key(key, generation), row, timeout=settings.FORECAST_CACHE_TTL)
+
+
+def get_forecast_row(city, date=None):
+    """Return the forecast row for a city and date, reading through the cache
+
+    Returns None when the table has no row for that date.
+    """
+    date = date or datetime.now().date().strftime('%Y-%m-%d')
+    key = (normalize_city_name(city), date)
+    generation = _current_generation(city)
+
+    row = _cached_row(key, generation)
+    if row is not _MISSING:
+        return row
+
+    response = get_supabase_client().table(get_forecast_table_name(city))\
+        .select("*")\
+        .eq('datetime', date)\
+        .order('datetime', desc=True)\
+        .limit(1)\
+        .execute()
+
+    row = response.data[0] if response.data else None
+    _store_row(key, generation, row)
+    return row
+
+
+async def aget_forecast_row(city, date=None):
+    """Async variant of get_forecast_row for the ASGI views
+
+    Shared-cache reads and writes go through the async cache API so a
+    networked backend never blocks the event loop.
+    """
+    date = date or datetime.now().date().strftime('%Y-%m-%d')
+    key = (normalize_city_name(city), date)
+    generation = await _acurrent_generation(city)
+
+    row = await _acached_row(key, generation)
+    if row is not _MISSING:
+        return row
+
+    response = await get_async_supabase_client().table(get_forecast_table_name(city))\
+        .select("*")\
+        .eq('datetime', date)\
+        .order('datetime', desc=True)\
+        .limit(1)\
+        .execute()
+
+    row = response.data[0] if response.data else None
+    await _astore_row(key, generation, row)
+    return row
+
+
+def get_forecast_cache_stats():
+    return _rows.stats()
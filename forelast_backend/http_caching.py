@@ -0,0 +1,138 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .cities import normalize_city_name
+
+# Scope shared by every city; bumped on every write so cross-city views change too
+ALL_CITIES = '*'
+
+
+def _version_key(scope):
+    return f"data_version:{scope}"
+
+
+def _new_version():
+    return {'token': uuid.uuid4().hex[:12], 'modified': int(time.time())}
+
+
+def get_data_version(scope):
+    """Return the current version record ({token, modified}) for a city or ALL_CITIES
+
+    A missing record is created on the spot with the current time, so losing
+    the cache can only make validators look newer, never stale.
+    """
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+async def aget_data_version(scope):
+    """Async variant of get_data_version"""
+    key = _version_key(scope)
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key) or version
+    return version
+
+
+def bump_data_versions(cities=None):
+    """Give written cities (and the shared scope) new validators"""
+    scopes = [normalize_city_name(city) for city in cities or []]
+    scopes.append(ALL_CITIES)
+    cache.set_many({_version_key(scope): _new_version() for scope in scopes}, timeout=None)
+
+
+def _validators(today, scope, versions):
+    etag = '"{}-{}-{}"'.format(scope, today.isoformat(), '-'.join(v['token'] for v in versions))
+    midnight = int(datetime.combine(today, datetime.min.time()).timestamp())
+    last_modified = max([midnight] + [v['modified'] for v in versions])
+    return etag, last_modified
+
+
+def get_validators(city=None):
+    """Build a strong ETag and Last-Modified time for a city's data, or for all cities
+
+    The date is part of both because "today" rolls over even without a write.
+    """
+    today = datetime.now().date()
+    versions = [get_data_version(ALL_CITIES)]
+    scope = 'all'
+    if city is not None:
+        scope = normalize_city_name(city)
+        versions.append(get_data_version(scope))
+    return _validators(today, scope, versions)
+
+
+async def aget_validators(city=None):
+    """Async variant of get_validators"""
+    today = datetime.now().date()
+    versions = [await aget_data_version(ALL_CITIES)]
+    scope = 'all'
+    if city is not None:
+        scope = normalize_city_name(city)
+        versions.append(await aget_data_version(scope))
+    return _validators(today, scope, versions)
+
+
+def conditional_data_response(max_age, per_city=True):
+    """Add ETag/Last-Modified/Cache-Control to a view and answer 304s without running it
+
+    With ``per_city`` the validators follow the ``city`` URL argument,
+    otherwise they follow the data version shared by all cities. Works on
+    both sync and async views.
+    """
+    def decorator(view_func):
+        def validators(request, kwargs):
+            etag, last_modified = get_validators(kwargs.get('city') if per_city else None)
+            return etag, last_modified, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        async def avalidators(request, kwargs):
+            etag, last_modified = await aget_validators(kwargs.get('city') if per_city else None)
+            return etag, last_modified, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+        def finish(response, etag, last_modified):
+            # Never let clients or CDNs revalidate their way into an error body
+            if response.status_code not in (200, 304):
+                return response
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, public=True, max_age=max_age)
+            return response
+
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_inner(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+
+                etag, last_modified, response = await avalidators(request, kwargs)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return finish(response, etag, last_modified)
+            return async_inner
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            etag, last_modified, response = validators(request, kwargs)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return finish(response, etag, last_modified)
+        return inner
+    return decorator
@@ -0,0 +1,39 @@
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+
+def _supplied_token(request):
+    token = request.headers.get('X-Internal-Token')
+    if token is None:
+        # Prometheus and most scrapers can only send a bearer token
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer':
+            token = ''
+    return token.strip()
+
+
+def internal_token_error(request):
+    """Return a 403 response unless the request carries INTERNAL_API_TOKEN, else None
+
+    Fails closed: while the token is unset the internal endpoints are off, not open.
+    """
+    token = settings.INTERNAL_API_TOKEN
+    if not token:
+        return JsonResponse({'error': 'Internal endpoints are disabled (INTERNAL_API_TOKEN is not set)'}, status=403)
+    if not hmac.compare_digest(_supplied_token(request).encode(), token.encode()):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return None
+
+
+def internal_token_required(view):
+    """Reject requests without the internal token (X-Internal-Token or Authorization: Bearer)"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        error = internal_token_error(request)
+        if error is not None:
+            return error
+        return view(request, *args, **kwargs)
+    return wrapper
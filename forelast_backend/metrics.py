@@ -0,0 +1,123 @@
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse, JsonResponse
+
+from .internal_auth import internal_token_required
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Upstream calls range from sub-millisecond spaCy lookups to multi-second completions
+UPSTREAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        'forelast_http_request_duration_seconds',
+        'Time to produce a response (headers, for streaming responses), by URL name',
+        ['view', 'method', 'status'],
+    )
+    UPSTREAM_LATENCY = prometheus_client.Histogram(
+        'forelast_upstream_request_duration_seconds',
+        'Time spent in calls to Supabase, DeepSeek, SMTP and spaCy',
+        ['target', 'operation'],
+        buckets=UPSTREAM_BUCKETS,
+    )
+    UPSTREAM_ERRORS = prometheus_client.Counter(
+        'forelast_upstream_errors_total',
+        'Upstream calls that raised',
+        ['target', 'operation'],
+    )
+    CACHE_REQUESTS = prometheus_client.Counter(
+        'forelast_cache_requests_total',
+        'Cache lookups by cache and result',
+        ['cache', 'result'],
+    )
+
+
+def record_upstream(target, operation, seconds, error=False):
+    if prometheus_client is None:
+        return
+    UPSTREAM_LATENCY.labels(target, operation).observe(seconds)
+    if error:
+        UPSTREAM_ERRORS.labels(target, operation).inc()
+
+
+@contextmanager
+def track_upstream(target, operation):
+    """Time the enclosed call to an upstream, counting it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record_upstream(target, operation, time.perf_counter() - started, error=True)
+        raise
+    record_upstream(target, operation, time.perf_counter() - started)
+
+
+def record_cache(cache, hit):
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.url_name or match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """Record a latency histogram per URL name, method and status class"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.process_response(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.process_response(request, response, started)
+
+    def process_response(self, request, response, started):
+        if prometheus_client is not None and request.path != '/metrics':
+            REQUEST_LATENCY.labels(
+                _view_name(request), request.method, f"{response.status_code // 100}xx"
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+@internal_token_required
+def metrics_view(request):
+    """Prometheus text exposition, merged across worker processes when multiprocess mode is on
+
+    Scrapers authenticate with INTERNAL_API_TOKEN (the ``authorization``
+    credentials in a Prometheus scrape config). Multiprocess mode needs
+    PROMETHEUS_MULTIPROC_DIR set to an empty, writable directory before the
+    workers start (and wiped on each deploy).
+    """
+    if prometheus_client is None:
+        return JsonResponse({'error': 'prometheus_client is not installed'}, status=503)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
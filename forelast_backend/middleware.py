@@ -1,9 +1,181 @@
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Types worth compressing; archives, Arrow and Parquet bodies are left alone
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/',
+)
+
+_ACCEPT_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q=([0-9.]+))?')
+
+
 class EnforceJSONMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        # Stay async under ASGI so async views are not pushed onto a thread
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
-        if request.path.startswith('/api/'):
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        # Only fill in the type for JSON bodies sent as Django's default text/html;
+        # anything a view chose (CSV, events, archives) is left as it is
+        if (
+            request.path.startswith('/api/')
+            and not response.streaming
+            and response.get('Content-Type', '').startswith('text/html')
+            and response.content.lstrip()[:1] in (b'{', b'[')
+        ):
             response['Content-Type'] = 'application/json'
+        return response
+
+
+def accepted_encodings(header):
+    """Return the content codings a client accepts, keyed by name, with their q-values"""
+    accepted = {}
+    for match in _ACCEPT_RE.finditer(header or ''):
+        coding, q = match.group(1).lower(), match.group(2)
+        try:
+            accepted[coding] = float(q) if q else 1.0
+        except ValueError:
+            continue
+    return accepted
+
+
+def choose_encoding(header):
+    """Pick brotli when available and accepted, otherwise gzip, otherwise None"""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get('*', 0)
+    options = [('br', brotli is not None), ('gzip', True)]
+    best = None
+    for coding, available in options:
+        q = accepted.get(coding, wildcard)
+        if available and q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+class _Compressor:
+    """Incremental gzip/brotli encoder; flush() makes everything so far decodable"""
+
+    def __init__(self, coding):
+        self.coding = coding
+        if coding == 'br':
+            self._encoder = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._encoder = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.coding == 'br':
+            return self._encoder.process(data)
+        return self._encoder.compress(data)
+
+    def flush(self):
+        if self.coding == 'br':
+            return self._encoder.flush()
+        return self._encoder.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.coding == 'br':
+            return self._encoder.finish()
+        return self._encoder.flush()
+
+    def chunks(self, content):
+        """Compress a byte iterator, flushing after every chunk so streams are not held back"""
+        for chunk in content:
+            data = self.compress(chunk) + self.flush()
+            if data:
+                yield data
+        yield self.finish()
+
+    async def achunks(self, content):
+        async for chunk in content:
+            data = self.compress(chunk) + self.flush()
+            if data:
+                yield data
+        yield self.finish()
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, as negotiated through Accept-Encoding
+
+    Buffered bodies are compressed when they reach COMPRESSION_MIN_SIZE.
+    Streaming bodies (downloads, chat events) are compressed chunk by chunk
+    and flushed after each one, so every chunk still reaches the client
+    straight away.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or request.method == 'HEAD':
+            return response
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if coding is None:
+            return response
+
+        compressor = _Compressor(coding)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compressor.achunks(response.streaming_content)
+            else:
+                response.streaming_content = compressor.chunks(response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The encoded bytes differ from the identity ones, so a strong ETag must become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
         return response
\ No newline at end of file
@@ -32,9 +32,130 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_OTP = os.getenv('EMAIL_OTP')
 EMAIL_OTP_PASSWORD = os.getenv('EMAIL_OTP_PASSWORD')
+EMAIL_OTP_HOST = os.getenv('EMAIL_OTP_HOST', 'smtp.gmail.com')
+EMAIL_OTP_PORT = int(os.getenv('EMAIL_OTP_PORT', 587))
+EMAIL_OTP_USE_TLS = os.getenv('EMAIL_OTP_USE_TLS', 'True') == 'True'
+
+# Shared Supabase client (one keep-alive pool per worker process)
+SUPABASE_POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', 60))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', 5))
+SUPABASE_READ_TIMEOUT = float(os.getenv('SUPABASE_READ_TIMEOUT', 30))
+SUPABASE_RECONNECT_RETRIES = int(os.getenv('SUPABASE_RECONNECT_RETRIES', 1))
+
+# Shared secret for the /api/internal/ refresh hooks and stats and /metrics; they answer 403 while it is unset
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+# Top cities leaderboard
+TOP_CITIES_WORKERS = int(os.getenv('TOP_CITIES_WORKERS', 8))
+TOP_CITIES_CITY_TIMEOUT = float(os.getenv('TOP_CITIES_CITY_TIMEOUT', 3))
+TOP_CITIES_SNAPSHOT = os.getenv('TOP_CITIES_SNAPSHOT', 'True') == 'True'
+TOP_CITIES_SNAPSHOT_TTL = int(os.getenv('TOP_CITIES_SNAPSHOT_TTL', 3600))
+
+# Read-through cache for daily forecast rows, keyed by (city, date)
+FORECAST_CACHE_TTL = int(os.getenv('FORECAST_CACHE_TTL', 900))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', 256))
+# How long a worker trusts its copy of the invalidation generations before
+# re-reading them from the shared cache (bounds how late other workers see a refresh)
+FORECAST_GENERATION_TTL = float(os.getenv('FORECAST_GENERATION_TTL', 5))
+
+# Rows per keyset page when streaming downloads (PostgREST caps responses at 1000 by default)
+DOWNLOAD_PAGE_SIZE = int(os.getenv('DOWNLOAD_PAGE_SIZE', 1000))
+
+# Preview paging and the per-city date index used for its record counts
+PREVIEW_MAX_PAGE_SIZE = int(os.getenv('PREVIEW_MAX_PAGE_SIZE', 100))
+DATE_INDEX_TTL = int(os.getenv('DATE_INDEX_TTL', 86400))
+
+# Serialized WeatherAnalyticsAPI payloads, rebuilt by the refresh hooks
+ANALYTICS_SNAPSHOT_TTL = int(os.getenv('ANALYTICS_SNAPSHOT_TTL', 86400))
+
+# Cache-Control max-age (seconds) for the polled read endpoints
+HTTP_MAX_AGE_CURRENT = int(os.getenv('HTTP_MAX_AGE_CURRENT', 300))
+HTTP_MAX_AGE_ANALYTICS = int(os.getenv('HTTP_MAX_AGE_ANALYTICS', 600))
+HTTP_MAX_AGE_TOP_CITIES = int(os.getenv('HTTP_MAX_AGE_TOP_CITIES', 300))
+
+# Worker threads for the multi-city batch endpoint
+BATCH_WEATHER_WORKERS = int(os.getenv('BATCH_WEATHER_WORKERS', 8))
+
+# Load Zephyr's spaCy model at startup instead of on the first chat message.
+# With gunicorn --preload this happens once in the master and is shared by workers.
+ZEPHYR_PRELOAD_NLP = os.getenv('ZEPHYR_PRELOAD_NLP', 'False') == 'True'
+
+# Chat completions endpoint; point at `manage.py deepseek_stub` to test offline
+DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions')
+DEEPSEEK_POOL_SIZE = int(os.getenv('DEEPSEEK_POOL_SIZE', 10))
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv('DEEPSEEK_CONNECT_TIMEOUT', 3))
+DEEPSEEK_READ_TIMEOUT = float(os.getenv('DEEPSEEK_READ_TIMEOUT', 15))
+DEEPSEEK_RETRIES = int(os.getenv('DEEPSEEK_RETRIES', 2))
+DEEPSEEK_RETRY_BACKOFF = float(os.getenv('DEEPSEEK_RETRY_BACKOFF', 0.25))
+# Consecutive failures before chat answers locally, and seconds before DeepSeek is tried again
+DEEPSEEK_BREAKER_THRESHOLD = int(os.getenv('DEEPSEEK_BREAKER_THRESHOLD', 5))
+DEEPSEEK_BREAKER_RESET = float(os.getenv('DEEPSEEK_BREAKER_RESET', 30))
+
+# Zephyr's DeepSeek reply cache (set the file to keep it across restarts)
+ZEPHYR_COMPLETION_CACHE_TTL = int(os.getenv('ZEPHYR_COMPLETION_CACHE_TTL', 21600))
+ZEPHYR_COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv('ZEPHYR_COMPLETION_CACHE_MAX_ENTRIES', 1024))
+ZEPHYR_COMPLETION_CACHE_HISTORY_TURNS = int(os.getenv('ZEPHYR_COMPLETION_CACHE_HISTORY_TURNS', 2))
+ZEPHYR_COMPLETION_CACHE_FILE = os.getenv('ZEPHYR_COMPLETION_CACHE_FILE', '')
+# Seconds a new reply waits before the file is rewritten, so bursts share one write
+ZEPHYR_COMPLETION_CACHE_SAVE_DELAY = float(os.getenv('ZEPHYR_COMPLETION_CACHE_SAVE_DELAY', 5))
+
+# Zephyr answers straight from the knowledge base, without DeepSeek, at or above these scores
+ZEPHYR_ROUTER_FAQ_THRESHOLD = float(os.getenv('ZEPHYR_ROUTER_FAQ_THRESHOLD', 0.9))
+ZEPHYR_ROUTER_GREETING_THRESHOLD = float(os.getenv('ZEPHYR_ROUTER_GREETING_THRESHOLD', 0.85))
+ZEPHYR_ROUTER_DIRECT_CATEGORIES = os.getenv('ZEPHYR_ROUTER_DIRECT_CATEGORIES', 'website_information').split(',')
+
+# Approximate tokens of chat history sent to DeepSeek; older turns are summarized to fit
+ZEPHYR_HISTORY_TOKEN_BUDGET = int(os.getenv('ZEPHYR_HISTORY_TOKEN_BUDGET', 600))
+ZEPHYR_HISTORY_SUMMARY_TOKENS = int(os.getenv('ZEPHYR_HISTORY_SUMMARY_TOKENS', 100))
+
+# Outgoing mail is queued here and sent by a background worker (see `manage.py run_outbox`)
+EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'True') == 'True'
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_RETRY_BACKOFF = float(os.getenv('EMAIL_OUTBOX_RETRY_BACKOFF', 2))
+EMAIL_SMTP_TIMEOUT = float(os.getenv('EMAIL_SMTP_TIMEOUT', 10))
+# Reopen the pooled SMTP connection after this long unused (servers drop idle sessions)
+EMAIL_SMTP_IDLE_TIMEOUT = float(os.getenv('EMAIL_SMTP_IDLE_TIMEOUT', 240))
+
+# Lifetimes (seconds) of the signed tokens issued at login
+AUTH_ACCESS_TOKEN_TTL = int(os.getenv('AUTH_ACCESS_TOKEN_TTL', 900))
+AUTH_REFRESH_TOKEN_TTL = int(os.getenv('AUTH_REFRESH_TOKEN_TTL', 1209600))
+
+# Response compression (brotli when the package is installed, otherwise gzip)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+
+# Route the weather read endpoints to the async views (run under an ASGI server)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Zephyr FAQ vector index, written by `manage.py build_faq_index`
+ZEPHYR_FAQ_INDEX_DIR = os.getenv('ZEPHYR_FAQ_INDEX_DIR', str(BASE_DIR / 'zephyr_index'))
+ZEPHYR_FAQ_NPROBE = int(os.getenv('ZEPHYR_FAQ_NPROBE', 8))
+EMAIL_OUTBOX_PATH = os.getenv('EMAIL_OUTBOX_PATH', str(BASE_DIR / 'email_outbox.sqlite3'))
+
+# One cache for every worker process (OTPs, forecast rows and generations, snapshots).
+# "sqlite" shares a file between processes on one host; "redis" (REDIS_URL) shares
+# across hosts; "locmem" is per-process and only suitable for a single worker.
+SHARED_CACHE_BACKEND = os.getenv('SHARED_CACHE_BACKEND', 'sqlite')
+if SHARED_CACHE_BACKEND == 'redis':
+    CACHES = {'default': {
+        'BACKEND': 'forelast_backend.shared_cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+    }}
+elif SHARED_CACHE_BACKEND == 'locmem':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+else:
+    CACHES = {'default': {
+        'BACKEND': 'forelast_backend.shared_cache.SQLiteCache',
+        'LOCATION': os.getenv('SHARED_CACHE_PATH', str(BASE_DIR / 'shared_cache.sqlite3')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 20000))},
+    }}
 load_dotenv(BASE_DIR / '.env')
 
 
@@ -75,6 +196,10 @@ class EnforceJSONMiddleware:
         return response
 
 MIDDLEWARE = [
+    # Outermost, so request latency covers every other middleware
+    'forelast_backend.metrics.MetricsMiddleware',
+    # Next, so it compresses the response after every other middleware has finished with it
+    'forelast_backend.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     # 'corsheaders.middleware.CorsPostCsrfMiddleware',
@@ -0,0 +1,203 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache as DjangoRedisCache
+from django.core.cache.backends.redis import RedisSerializer
+from django.utils.module_loading import import_string
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at);
+"""
+
+# Writes between sweeps of expired and excess entries, per process
+CULL_EVERY = 200
+
+
+class SQLiteCache(BaseCache):
+    """Django cache backend in one SQLite file, shared by every worker process on a host
+
+    Reads are a single indexed lookup in WAL mode, so they never wait on
+    writers. Read-modify-write operations (add, incr, pop) run inside
+    BEGIN IMMEDIATE, which makes them atomic across processes.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        # One connection per thread, and never one inherited across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expiry(self, timeout):
+        # Django's base class already turns the timeout into an absolute expiry time (or None)
+        return self.get_backend_timeout(timeout)
+
+    def _transaction(self, work):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _live(row, now):
+        return row is not None and (row[1] is None or row[1] > now)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connect().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if not self._live(row, time.time()):
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._connect().execute(
+            f"SELECT key, value, expires_at FROM cache WHERE key IN ({','.join('?' * len(keys))})",
+            list(keys),
+        ).fetchall()
+        return {keys[key]: pickle.loads(value) for key, value, expires_at in rows if self._live((value, expires_at), now)}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiry(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires_at = self._expiry(timeout)
+
+        def work(conn):
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if self._live(row, time.time()):
+                return False
+            conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                         (key, blob, expires_at))
+            return True
+
+        added = self._transaction(work)
+        if added:
+            self._maybe_cull()
+        return added
+
+    def pop(self, key, default=None, version=None):
+        """Return the value and delete it in one step, so only one caller ever gets it"""
+        key = self.make_and_validate_key(key, version=version)
+
+        def work(conn):
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return pickle.loads(row[0]) if self._live(row, time.time()) else default
+
+        return self._transaction(work)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+
+        def work(conn):
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if not self._live(row, time.time()):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            conn.execute("UPDATE cache SET value = ? WHERE key = ?", (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key))
+            return value
+
+        return self._transaction(work)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connect().execute(
+            "UPDATE cache SET expires_at = ? WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (self._expiry(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connect().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connect().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        return self._live(row, time.time())
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self._max_entries:
+            # Drop the entries closest to expiring, like the other Django backends cull a fraction
+            excess = count - self._max_entries + self._max_entries // self._cull_frequency
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at IS NULL, expires_at LIMIT ?)",
+                (excess,),
+            )
+
+
+class RedisCache(DjangoRedisCache):
+    """Django's Redis backend plus an atomic pop()"""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        # Resolved the same way as Django's client does, so pop() decodes what set() wrote
+        serializer = params.get('OPTIONS', {}).get('serializer') or RedisSerializer
+        if isinstance(serializer, str):
+            serializer = import_string(serializer)
+        self.serializer = serializer() if callable(serializer) else serializer
+
+    def pop(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # GET and DEL in one MULTI/EXEC so two callers can never both see the value
+        with self._cache.get_client(key, write=True).pipeline(transaction=True) as pipe:
+            value, _ = pipe.get(key).delete(key).execute()
+        return default if value is None else self.serializer.loads(value)
+
+
+def cache_pop(cache, key, default=None):
+    """Get and delete a cache entry atomically where the backend supports it"""
+    pop = getattr(cache, 'pop', None)
+    if pop is not None:
+        return pop(key, default)
+    # Other backends get then delete, which is not atomic
+    value = cache.get(key, default)
+    cache.delete(key)
+    return value
@@ -0,0 +1,278 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+
+import httpx
+from django.conf import settings
+from postgrest import AsyncPostgrestClient
+from postgrest.utils import AsyncClient, SyncClient
+from supabase import create_client
+from supabase.lib.client_options import SyncClientOptions
+
+from .metrics import track_upstream
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the pooled connection went bad rather than the query failing
+RECONNECT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+)
+
+# Per-call cap for callers that give up on a query sooner than SUPABASE_READ_TIMEOUT
+_request_timeout = contextvars.ContextVar('supabase_request_timeout', default=None)
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+# httpx.AsyncClient is bound to the event loop that first used it
+_async_clients = weakref.WeakKeyDictionary()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'clients_built': 0,
+    'client_checkouts': 0,
+    'requests': 0,
+    'new_connections': 0,
+    'reused_connections': 0,
+    'reconnects': 0,
+    'errors': 0,
+}
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+@contextmanager
+def request_timeout(seconds):
+    """Cap the connect/read/write/pool timeouts of Supabase requests made in this block
+
+    Lets a caller that stops waiting after ``seconds`` also free the thread
+    running the query instead of leaving it blocked for the full read timeout.
+    """
+    token = _request_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _request_timeout.reset(token)
+
+
+def _request_extensions(request, trace):
+    extensions = {**request.extensions, 'trace': trace}
+    seconds = _request_timeout.get()
+    if seconds is not None:
+        extensions['timeout'] = {
+            phase: seconds if limit is None else min(limit, seconds)
+            for phase, limit in request.extensions.get('timeout', {}).items()
+        }
+    return extensions
+
+
+def _table_name(request):
+    """PostgREST resource a request targets, used to label its metrics"""
+    path = request.url.path
+    return path.split('/rest/v1/', 1)[-1] or 'root'
+
+
+class _PooledTransport(httpx.HTTPTransport):
+    """HTTP transport that counts connection reuse and retries dropped keep-alive connections"""
+
+    def __init__(self, retries=1, **kwargs):
+        super().__init__(**kwargs)
+        self.reconnect_retries = retries
+
+    def handle_request(self, request):
+        attempt = 0
+        while True:
+            connected = []
+
+            def trace(event_name, info):
+                if event_name == 'connection.connect_tcp.complete':
+                    connected.append(True)
+
+            request.extensions = _request_extensions(request, trace)
+            try:
+                with track_upstream('supabase', _table_name(request)):
+                    response = super().handle_request(request)
+            except RECONNECT_ERRORS as e:
+                # Only idempotent reads are safe to replay on a fresh connection
+                if request.method not in ('GET', 'HEAD') or attempt >= self.reconnect_retries:
+                    _bump('errors')
+                    raise
+                attempt += 1
+                _bump('reconnects')
+                logger.warning(f"Supabase connection dropped ({e.__class__.__name__}), reconnecting")
+                continue
+
+            _bump('requests')
+            _bump('new_connections' if connected else 'reused_connections')
+            return response
+
+
+class _PooledAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async counterpart of _PooledTransport for the ASGI views"""
+
+    def __init__(self, retries=1, **kwargs):
+        super().__init__(**kwargs)
+        self.reconnect_retries = retries
+
+    async def handle_async_request(self, request):
+        attempt = 0
+        while True:
+            connected = []
+
+            async def trace(event_name, info):
+                if event_name == 'connection.connect_tcp.complete':
+                    connected.append(True)
+
+            request.extensions = _request_extensions(request, trace)
+            try:
+                with track_upstream('supabase', _table_name(request)):
+                    response = await super().handle_async_request(request)
+            except RECONNECT_ERRORS as e:
+                if request.method not in ('GET', 'HEAD') or attempt >= self.reconnect_retries:
+                    _bump('errors')
+                    raise
+                attempt += 1
+                _bump('reconnects')
+                logger.warning(f"Supabase connection dropped ({e.__class__.__name__}), reconnecting")
+                continue
+
+            _bump('requests')
+            _bump('new_connections' if connected else 'reused_connections')
+            return response
+
+
+def _client_settings():
+    url = getattr(settings, 'SUPABASE_URL', None) or os.getenv('SUPABASE_URL')
+    key = getattr(settings, 'SUPABASE_KEY', None) or os.getenv('SUPABASE_KEY')
+    timeout = httpx.Timeout(
+        settings.SUPABASE_READ_TIMEOUT,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+    )
+    limits = httpx.Limits(
+        max_connections=settings.SUPABASE_POOL_SIZE,
+        max_keepalive_connections=settings.SUPABASE_POOL_SIZE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+    return url, key, timeout, limits
+
+
+def _build_client():
+    """Create a Supabase client whose PostgREST session uses a keep-alive pool"""
+    url, key, timeout, limits = _client_settings()
+
+    client = create_client(url, key, options=SyncClientOptions(postgrest_client_timeout=timeout))
+
+    # supabase-py does not expose pool limits, so swap in our own session
+    postgrest = client.postgrest
+    default_session = postgrest.session
+    postgrest.session = SyncClient(
+        base_url=postgrest.base_url,
+        headers=default_session.headers,
+        timeout=timeout,
+        follow_redirects=True,
+        transport=_PooledTransport(
+            retries=settings.SUPABASE_RECONNECT_RETRIES,
+            limits=limits,
+            http2=True,
+        ),
+    )
+    default_session.close()
+
+    _bump('clients_built')
+    logger.info(f"Built pooled Supabase client (pid {os.getpid()}, pool size {settings.SUPABASE_POOL_SIZE})")
+    return client
+
+
+def get_supabase_client():
+    """Return the process-wide Supabase client, building it on first use"""
+    global _client, _client_pid
+
+    pid = os.getpid()
+    client = _client
+    if client is None or _client_pid != pid:
+        with _lock:
+            # Rebuild after a fork so workers never share the parent's sockets
+            if _client is None or _client_pid != pid:
+                _client = _build_client()
+                _client_pid = pid
+            client = _client
+
+    _bump('client_checkouts')
+    return client
+
+
+def _build_async_client():
+    """Create an async PostgREST client with the same pool settings"""
+    url, key, timeout, limits = _client_settings()
+
+    postgrest = AsyncPostgrestClient(
+        f"{url}/rest/v1",
+        headers={'apikey': key, 'Authorization': f"Bearer {key}"},
+        timeout=timeout,
+    )
+    postgrest.session = AsyncClient(
+        base_url=postgrest.base_url,
+        headers=postgrest.headers,
+        timeout=timeout,
+        follow_redirects=True,
+        transport=_PooledAsyncTransport(
+            retries=settings.SUPABASE_RECONNECT_RETRIES,
+            limits=limits,
+            http2=True,
+        ),
+    )
+
+    _bump('clients_built')
+    logger.info(f"Built async PostgREST client (pid {os.getpid()})")
+    return postgrest
+
+
+def get_async_supabase_client():
+    """Return the async PostgREST client for the running event loop
+
+    Supports the same ``.table(...)...execute()`` chains as the sync client,
+    with ``await`` on ``execute()``.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = _build_async_client()
+
+    _bump('client_checkouts')
+    return client
+
+
+def reset_supabase_client():
+    """Drop the shared client so the next caller builds a fresh one"""
+    global _client, _client_pid
+
+    with _lock:
+        client, _client = _client, None
+        _client_pid = None
+
+    if client is not None:
+        try:
+            client.postgrest.session.close()
+        except Exception as e:
+            logger.warning(f"Error closing Supabase session: {str(e)}")
+
+
+def get_client_stats():
+    """Return a snapshot of the connection reuse counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    stats['pid'] = os.getpid()
+    stats['pool_size'] = settings.SUPABASE_POOL_SIZE
+    return stats
@@ -0,0 +1,141 @@
+import re
+from types import SimpleNamespace
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder to run the app's queries in memory"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.columns = '*'
+        self.count = None
+
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.count = count
+        return self
+
+    def _filter(self, column, op, value):
+        self.filters.append((column, op, str(value)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def or_(self, filters):
+        self.filters.append((None, 'or', filters))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        if self.client.asynchronous:
+            return self._aexecute()
+        return self._execute()
+
+    async def _aexecute(self):
+        return self._execute()
+
+    def _execute(self):
+        self.client.queries.append(self)
+        if self.table not in self.client.tables:
+            raise Exception(f'relation "public.{self.table}" does not exist')
+
+        rows = [row for row in self.client.tables[self.table] if all(_matches(row, f) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: _key(row.get(column)), reverse=desc)
+        count = len(rows) if self.count else None
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        if self.columns == 'count':
+            rows = [{'count': count}]
+        elif self.columns != '*':
+            wanted = [name.strip() for name in self.columns.split(',')]
+            rows = [{name: row.get(name) for name in wanted} for row in rows]
+        return SimpleNamespace(data=[dict(row) for row in rows], count=count)
+
+
+class FakeSupabase:
+    """In-memory stand-in for the Supabase client; ``queries`` records every executed query
+
+    With ``asynchronous`` execute() returns a coroutine, like the async client.
+    """
+
+    def __init__(self, tables=None, asynchronous=False):
+        self.tables = tables or {}
+        self.queries = []
+        self.asynchronous = asynchronous
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def _key(value):
+    # Nulls sort last, as in Postgres
+    return (value is None, value)
+
+
+def _compare(value, op, target):
+    if value is None:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        target = type(value)(target)
+    else:
+        value = str(value)
+    return {
+        'eq': value == target, 'gt': value > target, 'gte': value >= target,
+        'lt': value < target, 'lte': value <= target,
+    }[op]
+
+
+def _split(expression):
+    """Split a PostgREST filter list on top-level commas"""
+    parts, depth, current = [], 0, ''
+    for ch in expression:
+        if ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current += ch
+    parts.append(current)
+    return parts
+
+
+def _matches_expression(row, expression):
+    nested = re.fullmatch(r'(and|or)\((.*)\)', expression)
+    if nested:
+        results = [_matches_expression(row, part) for part in _split(nested.group(2))]
+        return all(results) if nested.group(1) == 'and' else any(results)
+    column, op, target = expression.split('.', 2)
+    return _compare(row.get(column), op, target)
+
+
+def _matches(row, condition):
+    column, op, target = condition
+    if op == 'or':
+        return _matches_expression(row, f'or({target})')
+    return _compare(row.get(column), op, target)
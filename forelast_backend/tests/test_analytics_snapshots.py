@@ -0,0 +1,72 @@
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import analytics_snapshots
+from forelast_backend.analytics_snapshots import get_analytics_snapshot, render_analytics_snapshot
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+URL = '/api/weather/analytics/{}/'
+REFRESH_URL = '/api/internal/observations/refresh/'
+
+
+def _row(day, temp):
+    return {'id': day.toordinal(), 'datetime': day.isoformat(), 'temp': temp, 'humidity': 70.0, 'precip': 1.0, 'windspeed': 9.0}
+
+
+@override_settings(CACHES=LOCMEM, INTERNAL_API_TOKEN='s3cret')
+class AnalyticsSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        self.supabase = FakeSupabase({
+            'makati_city_weather': [_row(today - timedelta(days=d), 80.0 + d) for d in range(3, 0, -1)],
+            'makati_city_forecast': [_row(today + timedelta(days=d), 90.0 + d) for d in range(1, 4)],
+        })
+        for target in ['forelast_backend.analytics_snapshots.get_supabase_client', 'forelast_backend.date_index.get_supabase_client']:
+            patcher = mock.patch(target, return_value=self.supabase)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_miss_builds_then_hits_skip_supabase(self):
+        first = self.client.get(URL.format('makati'))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(self.supabase.queries), 2)
+        self.assertIsNotNone(get_analytics_snapshot('Makati'))
+
+        second = self.client.get(URL.format('MAKATI'))
+        self.assertEqual(len(self.supabase.queries), 2)
+        body = second.json()
+        self.assertEqual(body['city'], 'Makati')
+        self.assertEqual(body['historical']['temp'], [83.0, 82.0, 81.0])
+        self.assertEqual(body['forecast']['temp'], [91.0, 92.0, 93.0])
+        self.assertEqual(len(body['combined']['dates']), 6)
+
+    def test_observation_refresh_rebuilds_the_snapshot(self):
+        self.client.get(URL.format('makati'))
+        self.supabase.tables['makati_city_weather'].append(_row(date.today(), 85.0))
+
+        response = self.client.post(REFRESH_URL, json.dumps({'cities': ['Makati']}),
+                                    content_type='application/json', headers={'X-Internal-Token': 's3cret'})
+        self.assertEqual(response.json()['failed'], [])
+
+        queries = len(self.supabase.queries)
+        body = self.client.get(URL.format('makati')).json()
+        self.assertEqual(len(self.supabase.queries), queries)
+        self.assertEqual(body['historical']['temp'][-1], 85.0)
+
+    def test_failed_rebuild_drops_the_old_snapshot(self):
+        self.client.get(URL.format('makati'))
+        del self.supabase.tables['makati_city_weather']
+        self.assertEqual(analytics_snapshots.refresh_analytics_snapshots(['Makati']), ['Makati'])
+        self.assertIsNone(get_analytics_snapshot('Makati'))
+
+    def test_render_splices_the_requested_city(self):
+        self.assertEqual(render_analytics_snapshot('las piñas', b'{"a": 1}'),
+                         b'{"city": "Las Pi\\u00f1as", "a": 1}')
+        self.assertEqual(json.loads(render_analytics_snapshot('pasig', b'{}')), {'city': 'Pasig'})
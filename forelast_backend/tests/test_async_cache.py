@@ -0,0 +1,76 @@
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, SimpleTestCase, override_settings
+
+from forelast_backend import analytics_snapshots, forecast_cache, http_caching, top_cities
+from forelast_backend.async_views import AsyncCurrentWeatherAPI, AsyncTopCitiesAPI, AsyncWeatherAnalyticsAPI
+
+from .fakes import FakeSupabase
+
+
+class AsyncOnlyCache:
+    """A cache whose blocking methods fail, to prove the async paths never call them"""
+
+    def __init__(self):
+        self.data = {}
+
+    def __getattr__(self, name):
+        def blocking(*args, **kwargs):
+            raise AssertionError(f'cache.{name}() would block the event loop')
+        return blocking
+
+    async def aget(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def aget_many(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    async def aset(self, key, value, timeout=None):
+        self.data[key] = value
+
+    async def aadd(self, key, value, timeout=None):
+        return self.data.setdefault(key, value) is value
+
+
+@override_settings(TOP_CITIES_SNAPSHOT=True)
+class AsyncCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = AsyncOnlyCache()
+        today = date.today().isoformat()
+        self.supabase = FakeSupabase({
+            'makati_city_forecast': [{'id': 1, 'datetime': today, 'temp': 88.0, 'conditions': 'Clear'}],
+        }, asynchronous=True)
+        for module in (analytics_snapshots, forecast_cache, http_caching, top_cities):
+            patcher = mock.patch.object(module, 'cache', self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(forecast_cache, 'get_async_supabase_client', return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for local in (forecast_cache._rows, forecast_cache._generations):
+            local.clear()
+            self.addCleanup(local.clear)
+
+    def _get(self, view, url, **kwargs):
+        return async_to_sync(view.as_view())(AsyncRequestFactory().get(url), **kwargs)
+
+    def test_current_weather_reads_through_the_async_cache(self):
+        for _ in range(2):
+            response = self._get(AsyncCurrentWeatherAPI, '/api/weather/current/makati/', city='makati')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['ETag'])
+        self.assertEqual(len(self.supabase.queries), 1)
+        self.assertTrue(any(key.startswith('forecast_row:makati:') for key in self.cache.data))
+
+    def test_snapshot_hits(self):
+        self.cache.data[analytics_snapshots._snapshot_key('makati')] = b'{"summary": {}}'
+        response = self._get(AsyncWeatherAnalyticsAPI, '/api/weather/analytics/makati/', city='makati')
+        self.assertEqual(response.content, b'{"city": "Makati", "summary": {}}')
+
+        leaderboard = {'top_cities': [], 'last_updated': 'now'}
+        self.cache.data[top_cities._snapshot_key(date.today().isoformat())] = leaderboard
+        response = self._get(AsyncTopCitiesAPI, '/api/weather/top-cities/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"top_cities": [], "last_updated": "now"}')
@@ -0,0 +1,67 @@
+import json
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, override_settings
+
+from forelast_backend import analytics_snapshots, forecast_cache
+from forelast_backend.async_views import AsyncBatchWeatherAPI
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+URL = '/api/weather/batch/'
+SNAPSHOT = '{"historical": {"dates": ["Jan 01"], "temp": [80.5]}, "note": "Para\\u00f1aque, \\"NCR\\""}'
+
+
+@override_settings(CACHES=LOCMEM)
+class BatchWeatherTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        for local in (forecast_cache._rows, forecast_cache._generations):
+            local.clear()
+            self.addCleanup(local.clear)
+        tables = {
+            'makati_city_forecast': [{'id': 1, 'datetime': date.today().isoformat(), 'temp': 88.0, 'precip': 0}],
+            'quezon_city_forecast': [{'id': 1, 'datetime': date.today().isoformat(), 'temp': 91.0, 'precip': 0}],
+        }
+        self.supabase = FakeSupabase(tables)
+        self.async_supabase = FakeSupabase(tables, asynchronous=True)
+        for module in (forecast_cache, analytics_snapshots):
+            for name, client in [('get_supabase_client', self.supabase), ('get_async_supabase_client', self.async_supabase)]:
+                patcher = mock.patch.object(module, name, return_value=client)
+                patcher.start()
+                self.addCleanup(patcher.stop)
+        # Makati's analytics come from a stored snapshot; Quezon City has no weather table to build one
+        cache.set(analytics_snapshots._snapshot_key('Makati'), SNAPSHOT.encode('utf-8'))
+
+    def _check(self, body):
+        self.assertEqual(list(body['cities']), ['Makati', 'Quezon City'])
+        self.assertEqual(body['cities']['Makati']['analytics'], {'city': 'Makati', **json.loads(SNAPSHOT)})
+        self.assertEqual(body['cities']['Makati']['current']['temperature'], 88.0)
+        self.assertEqual(list(body['cities']['Quezon City']), ['current'])
+        self.assertEqual(body['errors']['atlantis'], {'city': 'Unknown city'})
+        self.assertIn('does not exist', body['errors']['Quezon City']['analytics'])
+        self.assertIn('last_updated', body)
+
+    def test_partial_failures_and_unknown_cities(self):
+        response = self.client.get(URL, {'cities': 'makati,atlantis,qc,Makati'})
+        self.assertEqual(response.status_code, 200)
+        self._check(json.loads(response.content))
+
+    def test_async_view_answers_the_same(self):
+        request = AsyncRequestFactory().get(URL, {'cities': 'makati,atlantis,qc,Makati'})
+        response = async_to_sync(AsyncBatchWeatherAPI.as_view())(request)
+        self.assertEqual(response.status_code, 200)
+        self._check(json.loads(response.content))
+
+    def test_only_unknown_cities(self):
+        body = self.client.get(URL, {'cities': 'atlantis', 'include': 'analytics'}).json()
+        self.assertEqual(body['cities'], {})
+        self.assertEqual(body['errors'], {'atlantis': {'city': 'Unknown city'}})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(URL).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'cities': 'makati', 'include': 'radar'}).status_code, 400)
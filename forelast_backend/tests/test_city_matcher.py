@@ -0,0 +1,47 @@
+from django.test import SimpleTestCase
+
+from forelast_backend.city_matcher import match_city
+
+
+class MatchCityTests(SimpleTestCase):
+    def assertCity(self, text, city):
+        match = match_city(text)
+        self.assertIsNotNone(match, text)
+        self.assertEqual(match.city, city, text)
+
+    def test_city_names_and_aliases(self):
+        self.assertCity("weather in makati tomorrow", 'Makati')
+        self.assertCity("quezoncity", 'Quezon City')
+        self.assertCity("uulan ba sa las pinas", 'Las Piñas')
+        self.assertCity("bgc", 'Taguig')
+        self.assertCity("signal village", 'Taguig')
+        self.assertCity("highway hills", 'Mandaluyong')
+
+    def test_typos(self):
+        self.assertCity("makaty", 'Makati')
+        self.assertCity("mandalyong", 'Mandaluyong')
+        self.assertCity("taguigg", 'Taguig')
+
+    def test_ambiguous_barangays_need_a_prefix(self):
+        self.assertCity("brgy parang", 'Marikina')
+        self.assertCity("barangay talon", 'Las Piñas')
+        self.assertCity("brgy rosario", 'Pasig')
+
+    def test_ordinary_words_are_not_cities(self):
+        for text in [
+            "weather village",
+            "the highway is flooded",
+            "pray the rosary",
+            "parang uulan mamaya",
+            "talon",
+            "paco", "hulo", "tanza", "rosario", "libertad", "concepcion", "cupang",
+            "timog", "commonwealth",
+            "village", "hills", "heights",
+            "ano ang panahon bukas",
+        ]:
+            with self.subTest(text=text):
+                self.assertIsNone(match_city(text))
+
+    def test_phrases_that_only_contain_a_city_name(self):
+        self.assertIsNone(match_city("metro manila"))
+        self.assertIsNone(match_city("manila bay sunset"))
@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import date_index
+from forelast_backend.date_index import DateIndex, get_date_index, refresh_date_indexes
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+PREVIEW_URL = '/api/internal/analytics/makati/preview/'
+
+
+def _rows(start, days, per_day=1):
+    rows = []
+    for offset in range(days):
+        for _ in range(per_day):
+            rows.append({'id': len(rows) + 1, 'datetime': (start + timedelta(days=offset)).isoformat(), 'temp': 80.0})
+    return rows
+
+
+class DateIndexTests(SimpleTestCase):
+    def test_with_tail_matches_a_full_build(self):
+        start = date(2025, 1, 1)
+        old = [start + timedelta(days=d) for d in (0, 0, 2, 5)]
+        new = [start + timedelta(days=d) for d in (5, 5, 6, 9)]
+        incremental = DateIndex.from_dates(old).with_tail(new)
+        full = DateIndex.from_dates(old[:-1] + new)
+
+        self.assertEqual(incremental.base, full.base)
+        self.assertEqual(incremental.prefix.tolist(), full.prefix.tolist())
+        self.assertEqual(incremental.last_day, start + timedelta(days=9))
+        self.assertEqual(incremental.count(start, start + timedelta(days=30)), 7)
+
+
+@override_settings(CACHES=LOCMEM, DOWNLOAD_PAGE_SIZE=3)
+class DateIndexMaintenanceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.supabase = FakeSupabase({'makati_city_weather': _rows(date(2025, 1, 1), 10)})
+        patcher = mock.patch.object(date_index, 'get_supabase_client', return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_miss_does_not_scan(self):
+        self.assertIsNone(get_date_index('makati'))
+        self.assertEqual(self.supabase.queries, [])
+
+    def test_days_split_across_pages_are_counted_once(self):
+        self.supabase.tables['makati_city_weather'] = _rows(date(2025, 1, 1), 5, per_day=2)
+        refresh_date_indexes(['makati'])
+        index = get_date_index('makati')
+        self.assertEqual(index.total, 10)
+        self.assertEqual(index.count(date(2025, 1, 2), date(2025, 1, 2)), 2)
+
+    def test_refresh_builds_then_extends(self):
+        refresh_date_indexes(['makati'])
+        self.assertEqual(get_date_index('makati').total, 10)
+
+        self.supabase.tables['makati_city_weather'] += [
+            {'id': 11, 'datetime': '2025-01-10', 'temp': 81.0},
+            {'id': 12, 'datetime': '2025-01-12', 'temp': 82.0},
+        ]
+        self.supabase.queries.clear()
+        self.assertEqual(refresh_date_indexes(['makati']), [])
+
+        index = get_date_index('makati')
+        self.assertEqual(index.total, 12)
+        self.assertEqual(index.count(date(2025, 1, 10), date(2025, 1, 10)), 2)
+        # Only the rows from the last indexed day on were read
+        self.assertIn(('datetime', 'gte', '2025-01-10'), self.supabase.queries[0].filters)
+
+
+@override_settings(CACHES=LOCMEM)
+class PreviewCountTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.supabase = FakeSupabase({'makati_city_weather': _rows(date(2025, 1, 1), 10)})
+        for target in ['forelast_backend.views.get_supabase_client', 'forelast_backend.date_index.get_supabase_client']:
+            patcher = mock.patch(target, return_value=self.supabase)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _preview(self, **params):
+        return self.client.get(PREVIEW_URL, {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'page_size': 4, **params})
+
+    def test_miss_counts_in_postgres(self):
+        body = self._preview().json()
+        self.assertEqual(body['total_records'], 10)
+        self.assertEqual([q.columns for q in self.supabase.queries], ['*', 'count'])
+
+    def test_index_hit_and_validated_cursor(self):
+        refresh_date_indexes(['makati'])
+        self.supabase.queries.clear()
+
+        body = self._preview(cursor='2025-01-04T00:00:00+00:00').json()
+        self.assertEqual(body['total_records'], 10)
+        self.assertEqual([row['datetime'] for row in body['preview']], ['2025-01-05', '2025-01-06', '2025-01-07', '2025-01-08'])
+        self.assertEqual(body['next_cursor'], '2025-01-08')
+        self.assertEqual(len(self.supabase.queries), 1)
+        self.assertIn(('datetime', 'gt', '2025-01-04'), self.supabase.queries[0].filters)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self._preview(cursor='not-a-date').status_code, 400)
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import forecast_cache
+from forelast_backend.forecast_cache import get_forecast_row, invalidate_forecasts
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class ForecastGenerationTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        for local in (forecast_cache._rows, forecast_cache._generations):
+            local.clear()
+            self.addCleanup(local.clear)
+        self.supabase = FakeSupabase({'makati_city_forecast': [{'id': 1, 'datetime': '2025-01-01', 'temp': 88.0}]})
+        patcher = mock.patch.object(forecast_cache, 'get_supabase_client', return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warm_lookup_stays_in_process(self):
+        get_forecast_row('makati', '2025-01-01')
+        with mock.patch.object(forecast_cache.cache, 'get_many', side_effect=AssertionError('shared cache read')):
+            self.assertEqual(get_forecast_row('Makati', '2025-01-01')['temp'], 88.0)
+        self.assertEqual(len(self.supabase.queries), 1)
+
+    def test_invalidation_is_seen_at_once_here(self):
+        get_forecast_row('makati', '2025-01-01')
+        self.supabase.tables['makati_city_forecast'][0]['temp'] = 90.0
+        invalidate_forecasts(['Makati'])
+        self.assertEqual(get_forecast_row('makati', '2025-01-01')['temp'], 90.0)
+
+    def test_other_workers_catch_up_after_the_ttl(self):
+        get_forecast_row('makati', '2025-01-01')
+        self.supabase.tables['makati_city_forecast'][0]['temp'] = 90.0
+        # Another worker's refresh only touches the shared generation
+        forecast_cache._bump(forecast_cache._city_generation_key('makati'))
+
+        self.assertEqual(get_forecast_row('makati', '2025-01-01')['temp'], 88.0)
+        forecast_cache._generations.clear()
+        self.assertEqual(get_forecast_row('makati', '2025-01-01')['temp'], 90.0)
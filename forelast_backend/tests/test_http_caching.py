@@ -0,0 +1,64 @@
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import forecast_cache
+from forelast_backend.http_caching import bump_data_versions
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+URL = '/api/internal/current/makati/'
+
+
+@override_settings(CACHES=LOCMEM)
+class ConditionalResponseTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        for local in (forecast_cache._rows, forecast_cache._generations):
+            local.clear()
+            self.addCleanup(local.clear)
+        self.supabase = FakeSupabase({
+            'makati_city_forecast': [{'id': 1, 'datetime': date.today().isoformat(), 'temp': 88.0}],
+        })
+        patcher = mock.patch.object(forecast_cache, 'get_supabase_client', return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_request_is_a_304_without_running_the_view(self):
+        first = self.client.get(URL)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(f'max-age={settings.HTTP_MAX_AGE_CURRENT}', first['Cache-Control'])
+        self.assertIn('public', first['Cache-Control'])
+
+        with mock.patch('forelast_backend.views.get_forecast_row') as get_forecast_row:
+            for headers in [{'If-None-Match': first['ETag']}, {'If-Modified-Since': first['Last-Modified']}]:
+                with self.subTest(headers=headers):
+                    response = self.client.get(URL, headers=headers)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.content, b'')
+                    self.assertEqual(response['ETag'], first['ETag'])
+            get_forecast_row.assert_not_called()
+
+    def test_bump_changes_the_validators(self):
+        first = self.client.get(URL)
+        bump_data_versions(['Makati'])
+
+        response = self.client.get(URL, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(self.client.get(URL, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+    def test_errors_get_no_validators_and_scopes_differ(self):
+        makati = self.client.get(URL)['ETag']
+        pasig = self.client.get('/api/internal/current/pasig/')
+        self.assertEqual(pasig.status_code, 500)
+        self.assertFalse(pasig.has_header('ETag'))
+        self.assertFalse(pasig.has_header('Cache-Control'))
+
+        with mock.patch('forelast_backend.views.get_top_cities', return_value={'top_cities': []}):
+            top = self.client.get('/api/weather/top-cities')['ETag']
+        self.assertNotEqual(makati, top)
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+STATS_URL = '/api/internal/stats/'
+METRICS_URL = '/metrics'
+
+
+class InternalStatsAuthTests(SimpleTestCase):
+    @override_settings(INTERNAL_API_TOKEN='')
+    def test_disabled_without_a_token(self):
+        response = self.client.get(STATS_URL, headers={'X-Internal-Token': ''})
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('disabled', response.json()['error'])
+
+    @override_settings(INTERNAL_API_TOKEN='s3cret')
+    def test_wrong_or_missing_token(self):
+        for headers in [{}, {'X-Internal-Token': 'wrong'}, {'Authorization': 'Bearer wrong'}, {'Authorization': 's3cret'}]:
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.get(STATS_URL, headers=headers).status_code, 403)
+
+    @override_settings(INTERNAL_API_TOKEN='s3cret')
+    @mock.patch('forelast_backend.views.get_outbox_stats', return_value={})
+    def test_right_token(self, get_outbox_stats):
+        for headers in [{'X-Internal-Token': 's3cret'}, {'Authorization': 'Bearer s3cret'}]:
+            with self.subTest(headers=headers):
+                response = self.client.get(STATS_URL, headers=headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('supabase', response.json())
+
+
+class MetricsAuthTests(SimpleTestCase):
+    @override_settings(INTERNAL_API_TOKEN='')
+    def test_disabled_without_a_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+    @override_settings(INTERNAL_API_TOKEN='s3cret')
+    def test_scrape_needs_the_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        self.assertEqual(self.client.get(METRICS_URL, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+
+        response = self.client.get(METRICS_URL, headers={'Authorization': 'Bearer s3cret'})
+        self.assertIn(response.status_code, (200, 503))
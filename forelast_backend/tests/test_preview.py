@@ -0,0 +1,84 @@
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+
+from forelast_backend.async_views import AsyncWeatherDataPreviewAPI
+from forelast_backend.date_index import refresh_date_indexes
+from forelast_backend.views import WeatherDataPreviewAPI
+
+from .fakes import FakeSupabase
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+URL = '/api/internal/analytics/makati/preview/'
+
+
+def _rows():
+    start = date(2025, 1, 1)
+    return [{'id': d + 1, 'datetime': (start + timedelta(days=d)).isoformat(), 'temp': 80.0 + d} for d in range(12)]
+
+
+@override_settings(CACHES=LOCMEM)
+class SyncAsyncPreviewTests(SimpleTestCase):
+    """Both preview views share their helpers, so they must answer identically"""
+
+    def setUp(self):
+        cache.clear()
+        tables = {'makati_city_weather': _rows()}
+        self.sync_supabase = FakeSupabase(tables)
+        self.async_supabase = FakeSupabase(tables, asynchronous=True)
+        for target, client in [
+            ('forelast_backend.views.get_supabase_client', self.sync_supabase),
+            ('forelast_backend.date_index.get_supabase_client', self.sync_supabase),
+            ('forelast_backend.async_views.get_async_supabase_client', self.async_supabase),
+        ]:
+            patcher = mock.patch(target, return_value=client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _both(self, params):
+        sync = WeatherDataPreviewAPI.as_view()(RequestFactory().get(URL, params), city='makati')
+        view = AsyncWeatherDataPreviewAPI.as_view()
+        asynchronous = async_to_sync(view)(AsyncRequestFactory().get(URL, params), city='makati')
+        return sync, asynchronous
+
+    def assertSame(self, params):
+        sync, asynchronous = self._both(params)
+        self.assertEqual(sync.status_code, asynchronous.status_code, params)
+        self.assertEqual(json.loads(sync.content), json.loads(asynchronous.content), params)
+        return sync
+
+    def test_same_answers(self):
+        cases = [
+            {},
+            {'start_date': '2025-01-01'},
+            {'start_date': '2025-02-01', 'end_date': '2025-01-01'},
+            {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'page_size': 0},
+            {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'cursor': 'nope'},
+            {'start_date': '2024-01-01', 'end_date': '2024-01-31'},
+            {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'page_size': 5},
+            {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'page_size': 5, 'cursor': '2025-01-10'},
+            {'start_date': '2025-01-01', 'end_date': '2025-01-31', 'page_size': 5, 'cursor': '2025-01-12'},
+        ]
+        for index_built in (False, True):
+            if index_built:
+                refresh_date_indexes(['makati'])
+            for params in cases:
+                with self.subTest(params=params, index_built=index_built):
+                    self.assertSame(params)
+
+    def test_page_through(self):
+        refresh_date_indexes(['makati'])
+        params = {'start_date': '2025-01-03', 'end_date': '2025-01-31', 'page_size': 4}
+        seen = []
+        while True:
+            body = json.loads(self.assertSame(params).content)
+            self.assertEqual(body['total_records'], 10)
+            seen += [row['id'] for row in body['preview']]
+            if not body['next_cursor']:
+                break
+            params['cursor'] = body['next_cursor']
+        self.assertEqual(seen, list(range(3, 13)))
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase, override_settings
+
+
+class RefreshHookAuthTests(SimpleTestCase):
+    urls = ['/api/internal/forecasts/refresh/', '/api/internal/observations/refresh/']
+
+    @override_settings(INTERNAL_API_TOKEN='')
+    def test_disabled_without_a_token(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.post(url, '{}', content_type='application/json')
+                self.assertEqual(response.status_code, 403)
+                self.assertIn('disabled', response.json()['error'])
+
+    @override_settings(INTERNAL_API_TOKEN='s3cret')
+    def test_wrong_or_missing_token(self):
+        for url in self.urls:
+            for headers in [{}, {'X-Internal-Token': 'wrong'}, {'X-Internal-Token': 's3cre'}]:
+                with self.subTest(url=url, headers=headers):
+                    response = self.client.post(url, '{}', content_type='application/json', headers=headers)
+                    self.assertEqual(response.status_code, 403)
+                    self.assertEqual(response.json(), {'error': 'Forbidden'})
+
+    @override_settings(INTERNAL_API_TOKEN='s3cret')
+    def test_right_token_reaches_the_body_check(self):
+        response = self.client.post(
+            self.urls[0], 'not json', content_type='application/json', headers={'X-Internal-Token': 's3cret'}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from forelast_backend.shared_cache import RedisCache, cache_pop
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get(self, key):
+        self.commands.append(lambda: self.store.get(key))
+        return self
+
+    def delete(self, key):
+        self.commands.append(lambda: int(self.store.pop(key, None) is not None))
+        return self
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def set(self, key, value, **kwargs):
+        self.store[key] = value
+
+    def pipeline(self, transaction=True):
+        assert transaction
+        return FakePipeline(self.store)
+
+
+@unittest.skipIf(redis is None, 'redis is not installed')
+class RedisPopTests(SimpleTestCase):
+    def _cache(self, options=None):
+        cache = RedisCache('redis://127.0.0.1:6379/0', {'OPTIONS': options or {}})
+        client = FakeRedis()
+        patcher = mock.patch.object(cache._cache, 'get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cache
+
+    def test_pop_returns_the_value_once(self):
+        cache = self._cache()
+        for value in [{'uid': 7}, 42]:
+            with self.subTest(value=value):
+                cache.set('otp', value)
+                self.assertEqual(cache_pop(cache, 'otp'), value)
+                self.assertEqual(cache_pop(cache, 'otp', 'gone'), 'gone')
+
+    def test_pop_uses_the_configured_serializer(self):
+        cache = self._cache({'serializer': 'django.core.cache.backends.redis.RedisSerializer'})
+        cache.set('otp', 'x' * 3)
+        self.assertEqual(cache.pop('otp'), 'xxx')
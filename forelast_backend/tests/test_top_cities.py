@@ -0,0 +1,48 @@
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import supabase_client, top_cities
+from forelast_backend.supabase_client import _PooledTransport, request_timeout
+
+
+class RequestTimeoutTests(SimpleTestCase):
+    def _sent_timeout(self, **client_kwargs):
+        sent = []
+
+        def handle_request(transport, request):
+            sent.append(request.extensions['timeout'])
+            return httpx.Response(200, json=[])
+
+        with mock.patch.object(httpx.HTTPTransport, 'handle_request', handle_request):
+            with httpx.Client(transport=_PooledTransport(), **client_kwargs) as client:
+                client.get('https://example.supabase.co/rest/v1/makati_city_forecast')
+        return sent[0]
+
+    def test_caps_every_phase(self):
+        timeout = httpx.Timeout(30, connect=5)
+        self.assertEqual(self._sent_timeout(timeout=timeout)['read'], 30)
+        with request_timeout(3):
+            self.assertEqual(
+                self._sent_timeout(timeout=timeout),
+                {'connect': 3, 'read': 3, 'write': 3, 'pool': 3},
+            )
+            self.assertEqual(self._sent_timeout(timeout=httpx.Timeout(30, connect=1))['connect'], 1)
+            self.assertEqual(self._sent_timeout(timeout=None)['read'], 3)
+
+    @override_settings(TOP_CITIES_CITY_TIMEOUT=2.5)
+    def test_leaderboard_queries_use_the_city_timeout(self):
+        seen = []
+
+        def get_forecast_row(city, today):
+            seen.append(supabase_client._request_timeout.get())
+            return {'temp': 90.0}
+
+        with mock.patch.object(top_cities, 'get_forecast_row', get_forecast_row):
+            leaders, complete = top_cities.fetch_top_cities('2025-01-01')
+
+        self.assertTrue(complete)
+        self.assertEqual(len(leaders), top_cities.TOP_COUNT)
+        self.assertEqual(set(seen), {2.5})
+        self.assertIsNone(supabase_client._request_timeout.get())
@@ -0,0 +1,85 @@
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import date
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from forelast_backend import weather_export
+
+from .fakes import FakeSupabase
+
+URL = '/api/internal/analytics/makati/download/'
+DATES = {'start_date': '2025-01-01', 'end_date': '2025-01-31'}
+
+
+@mock.patch('forelast_backend.views.iter_city_pages', return_value=iter([]))
+class WeatherDownloadCitiesTests(SimpleTestCase):
+    def test_unknown_cities_are_rejected(self, iter_city_pages):
+        for cities in ['atlantis', 'makati,atlantis', 'all_tables']:
+            with self.subTest(cities=cities):
+                response = self.client.get(URL, {**DATES, 'cities': cities, 'format': 'parquet'})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Unknown cities', response.json()['error'])
+        iter_city_pages.assert_not_called()
+
+    def test_aliases_resolve_to_cities(self, iter_city_pages):
+        response = self.client.get(URL, {**DATES, 'cities': ' qc , ', 'format': 'csv'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(iter_city_pages.call_args.args[0], ['Quezon City'])
+
+    def test_url_city_without_cities_param(self, iter_city_pages):
+        self.client.get(URL, DATES)
+        self.assertEqual(iter_city_pages.call_args.args[0], ['makati'])
+
+
+def _weather_rows():
+    # Two rows share each datetime, so every page boundary splits a day
+    rows = []
+    for day in range(1, 6):
+        for station in range(2):
+            rows.append({'id': len(rows) + 1, 'name': 'Makati', 'datetime': f'2025-01-{day:02d}',
+                         'temp': 80.0 + len(rows), 'windgust': None if len(rows) < 3 else 20.5, 'conditions': 'Clear'})
+    return rows
+
+
+@override_settings(DOWNLOAD_PAGE_SIZE=3)
+class WeatherDownloadRoundTripTests(SimpleTestCase):
+    def setUp(self):
+        self.rows = _weather_rows()
+        self.supabase = FakeSupabase({'makati_city_weather': self.rows})
+        patcher = mock.patch.object(weather_export, 'get_supabase_client', return_value=self.supabase)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _download(self, **params):
+        response = self.client.get(URL, {**DATES, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_pages_do_not_drop_rows_sharing_a_datetime(self):
+        pages = list(weather_export.iter_weather_pages('makati', date(2025, 1, 1), date(2025, 1, 31)))
+        self.assertEqual([row['id'] for page in pages for row in page], list(range(1, 11)))
+        self.assertIn(('datetime', 'gte', '2025-01-01'), self.supabase.queries[1].filters)
+
+    def test_csv_round_trip(self):
+        body = self._download(format='csv', compression='gzip')
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(body).decode('utf-8'))))
+        self.assertEqual([int(row['id']) for row in rows], list(range(1, 11)))
+        self.assertEqual(rows[0]['windgust'], '')
+        self.assertEqual(float(rows[-1]['windgust']), 20.5)
+
+    def test_ndjson_round_trip(self):
+        rows = [json.loads(line) for line in self._download(format='ndjson').splitlines()]
+        self.assertEqual(rows, self.rows)
+
+    @unittest.skipIf(weather_export.pa is None, 'pyarrow is not installed')
+    def test_parquet_round_trip(self):
+        table = weather_export.pq.read_table(io.BytesIO(self._download(format='parquet')))
+        self.assertEqual(table.column('id').to_pylist(), list(range(1, 11)))
+        self.assertEqual(table.column('windgust').to_pylist(), [None] * 3 + [20.5] * 7)
+        self.assertEqual(table.column('temp').to_pylist(), [row['temp'] for row in self.rows])
+        self.assertEqual(table.column('datetime').to_pylist()[1], date(2025, 1, 1))
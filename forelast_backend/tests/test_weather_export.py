@@ -0,0 +1,44 @@
+import io
+import unittest
+
+from django.test import SimpleTestCase
+
+from forelast_backend.weather_export import pa, pq, stream_arrow, stream_parquet
+
+
+def _row(day, **values):
+    row = {'id': day, 'name': 'Makati City, National Capital Region, Philippines',
+           'datetime': f'2025-01-{day:02d}', 'temp': 80.5, 'windgust': None, 'snow': None, 'severerisk': None}
+    row.update(values)
+    return row
+
+
+@unittest.skipIf(pa is None, 'pyarrow is not installed')
+class ColumnarSchemaTests(SimpleTestCase):
+    def test_null_first_row_keeps_numeric_types(self):
+        pages = [[_row(1), _row(2, windgust=21.3, severerisk=10)], [_row(3, snow='')]]
+        table = pq.read_table(io.BytesIO(b''.join(stream_parquet(('Makati', page) for page in pages))))
+
+        self.assertEqual(table.schema.field('datetime').type, pa.date32())
+        self.assertEqual(table.schema.field('id').type, pa.int64())
+        self.assertEqual(table.schema.field('name').type, pa.string())
+        for name in ['temp', 'windgust', 'snow', 'severerisk']:
+            self.assertEqual(table.schema.field(name).type, pa.float32(), name)
+        windgust = table.column('windgust').to_pylist()
+        self.assertIsNone(windgust[0])
+        self.assertAlmostEqual(windgust[1], 21.3, places=4)
+        self.assertEqual(table.column('snow').to_pylist(), [None, None, None])
+
+    def test_later_cities_keep_their_columns(self):
+        city_pages = [('Makati', [_row(1)]), ('Pasig', [_row(1, windgust=30.0, uvindex=7)])]
+        table = pq.read_table(io.BytesIO(b''.join(stream_parquet(city_pages, with_city=True))))
+
+        self.assertEqual(table.column('city').to_pylist(), ['Makati', 'Pasig'])
+        self.assertEqual(table.column('windgust').to_pylist(), [None, 30.0])
+        self.assertEqual(table.column('uvindex').to_pylist(), [None, 7.0])
+
+    def test_arrow_stream_uses_the_same_schema(self):
+        reader = pa.ipc.open_stream(b''.join(stream_arrow([[_row(1)], [_row(2, windgust=12.5)]])))
+        table = reader.read_all()
+        self.assertEqual(table.schema.field('windgust').type, pa.float32())
+        self.assertEqual(table.column('windgust').to_pylist(), [None, 12.5])
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from concurrent.futures import wait
+from datetime import datetime
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+from .forecast_cache import aget_forecast_row, get_forecast_row
+from .metrics import record_cache
+from .supabase_client import request_timeout
+from .workers import get_executor
+
+logger = logging.getLogger(__name__)
+
+# We'll check forecast tables for major cities
+LEADERBOARD_CITIES = [
+    "Manila", "Quezon City", "Caloocan", "Las Piñas", "Makati",
+    "Malabon", "Mandaluyong", "Marikina", "Muntinlupa", "Navotas",
+    "Parañaque", "Pasay", "Pasig", "San Juan", "Taguig", "Valenzuela"
+]
+
+TOP_COUNT = 5
+
+def _fetch_city_temp(city, today):
+    """Fetch today's forecast temperature for one city"""
+    # Give up on the query when fetch_top_cities stops waiting, so a slow
+    # city does not keep holding one of the shared pool's threads
+    with request_timeout(settings.TOP_CITIES_CITY_TIMEOUT):
+        row = get_forecast_row(city, today)
+    if row:
+        return {
+            'city': city,
+            'temp': row.get('temp', 0)
+        }
+    return None
+
+
+def fetch_top_cities(today=None):
+    """Query every city concurrently and rank them by temperature
+
+    Returns the top cities and whether every city answered in time.
+    """
+    today = today or datetime.now().date().isoformat()
+    executor = get_executor('top-cities', settings.TOP_CITIES_WORKERS)
+
+    futures = {
+        executor.submit(_fetch_city_temp, city, today): city
+        for city in LEADERBOARD_CITIES
+    }
+    # Cities run in parallel, so the per-city timeout also bounds the whole fan-out
+    done, not_done = wait(futures, timeout=settings.TOP_CITIES_CITY_TIMEOUT)
+
+    for future in not_done:
+        future.cancel()
+        logger.warning(f"Timed out fetching data for {futures[future]}")
+
+    top_cities = []
+    complete = not not_done
+    for future in done:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"Could not fetch data for {futures[future]}: {str(e)}")
+            # A missing table is permanent; a network failure is worth retrying
+            if isinstance(e, httpx.HTTPError):
+                complete = False
+            continue
+        if result:
+            top_cities.append(result)
+
+    # Sort by temperature (descending) and take top 5
+    top_cities = sorted(top_cities, key=lambda x: x['temp'], reverse=True)[:TOP_COUNT]
+    return top_cities, complete
+
+
+async def afetch_top_cities(today=None):
+    """Async variant of fetch_top_cities: one task per city on the event loop"""
+    today = today or datetime.now().date().isoformat()
+
+    async def fetch(city):
+        row = await asyncio.wait_for(
+            aget_forecast_row(city, today),
+            timeout=settings.TOP_CITIES_CITY_TIMEOUT,
+        )
+        return {'city': city, 'temp': row.get('temp', 0)} if row else None
+
+    results = await asyncio.gather(
+        *(fetch(city) for city in LEADERBOARD_CITIES),
+        return_exceptions=True,
+    )
+
+    top_cities = []
+    complete = True
+    for city, result in zip(LEADERBOARD_CITIES, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not fetch data for {city}: {str(result) or result.__class__.__name__}")
+            if isinstance(result, (httpx.HTTPError, asyncio.TimeoutError)):
+                complete = False
+            continue
+        if result:
+            top_cities.append(result)
+
+    top_cities = sorted(top_cities, key=lambda x: x['temp'], reverse=True)[:TOP_COUNT]
+    return top_cities, complete
+
+
+def _snapshot_key(today):
+    return f"top_cities:{today}"
+
+
+def refresh_top_cities_snapshot():
+    """Rebuild today's leaderboard and store it for TopCitiesAPI"""
+    today = datetime.now().date().isoformat()
+    top_cities, complete = fetch_top_cities(today)
+    snapshot = {
+        'top_cities': top_cities,
+        'last_updated': datetime.now().isoformat()
+    }
+
+    # Never pin a leaderboard with missing cities for the whole TTL
+    if complete:
+        cache.set(_snapshot_key(today), snapshot, timeout=settings.TOP_CITIES_SNAPSHOT_TTL)
+        logger.info(f"Refreshed top cities snapshot for {today}")
+    return snapshot
+
+
+def get_top_cities():
+    """Return today's leaderboard, from the snapshot when enabled"""
+    if not settings.TOP_CITIES_SNAPSHOT:
+        top_cities, _ = fetch_top_cities()
+        return {
+            'top_cities': top_cities,
+            'last_updated': datetime.now().isoformat()
+        }
+
+    snapshot = cache.get(_snapshot_key(datetime.now().date().isoformat()))
+    record_cache('top_cities_snapshot', snapshot is not None)
+    if snapshot is None:
+        snapshot = refresh_top_cities_snapshot()
+    return snapshot
+
+
+async def aget_top_cities():
+    """Async variant of get_top_cities"""
+    today = datetime.now().date().isoformat()
+    if settings.TOP_CITIES_SNAPSHOT:
+        snapshot = await cache.aget(_snapshot_key(today))
+        record_cache('top_cities_snapshot', snapshot is not None)
+        if snapshot is not None:
+            return snapshot
+
+    top_cities, complete = await afetch_top_cities(today)
+    snapshot = {
+        'top_cities': top_cities,
+        'last_updated': datetime.now().isoformat()
+    }
+    if settings.TOP_CITIES_SNAPSHOT and complete:
+        await cache.aset(_snapshot_key(today), snapshot, timeout=settings.TOP_CITIES_SNAPSHOT_TTL)
+    return snapshot
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry TTL and LRU eviction
+
+    Each entry can carry a version tag. A lookup that passes a different
+    version treats the entry as stale, which lets writers invalidate readers
+    by bumping a counter instead of tracking every key.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'stale': 0,
+            'evictions': 0,
+        }
+
+    def get(self, key, version=None, default=None):
+        """Return the cached value, or default when missing, expired or stale"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+
+            value, expires_at, entry_version = entry
+            if expires_at <= now or entry_version != version:
+                del self._data[key]
+                self._stats['expired' if expires_at <= now else 'stale'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, version=None, ttl=None):
+        """Store a value, evicting the least recently used entries when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at, version)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self):
+        """Return (key, value, seconds left, version) for every live entry, oldest first"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value, expires_at - now, version)
+                for key, (value, expires_at, version) in self._data.items()
+                if expires_at > now
+            ]
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['max_entries'] = self.max_entries
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
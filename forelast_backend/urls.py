@@ -16,18 +16,40 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from .views import WeatherAnalyticsAPI, CurrentWeatherAPI, WeatherDataDownloadAPI, WeatherDataPreviewAPI, TopCitiesAPI
+from .views import WeatherAnalyticsAPI, CurrentWeatherAPI, WeatherDataDownloadAPI, WeatherDataPreviewAPI, TopCitiesAPI, BatchWeatherAPI, InternalStatsAPI, ForecastRefreshAPI, ObservationRefreshAPI
+from . import async_views
 from django.views.generic import TemplateView
+from django.conf import settings
+from .metrics import metrics_view
+
+# The weather read endpoints run as native async views when ASYNC_VIEWS is on
+if settings.ASYNC_VIEWS:
+    analytics_view = async_views.AsyncWeatherAnalyticsAPI.as_view()
+    current_view = async_views.AsyncCurrentWeatherAPI.as_view()
+    preview_view = async_views.AsyncWeatherDataPreviewAPI.as_view()
+    top_cities_view = async_views.AsyncTopCitiesAPI.as_view()
+    batch_view = async_views.AsyncBatchWeatherAPI.as_view()
+else:
+    analytics_view = WeatherAnalyticsAPI.as_view()
+    current_view = CurrentWeatherAPI.as_view()
+    preview_view = WeatherDataPreviewAPI.as_view()
+    top_cities_view = TopCitiesAPI.as_view()
+    batch_view = BatchWeatherAPI.as_view()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/zephyr/', include('forelast_backend.apps.zephyr_ai.urls')),
-    path('api/weather/analytics/<str:city>/', WeatherAnalyticsAPI.as_view(), name='weather-analytics'),
-    path('api/internal/current/<str:city>/', CurrentWeatherAPI.as_view(), name='current-weather'),
-    path('api/internal/analytics/<str:city>/', WeatherAnalyticsAPI.as_view(), name='internal-weather-analytics'),
-    path('api/internal/analytics/<str:city>/preview/', WeatherDataPreviewAPI.as_view(), name='weather-data-preview'),
+    path('api/weather/analytics/<str:city>/', analytics_view, name='weather-analytics'),
+    path('api/internal/current/<str:city>/', current_view, name='current-weather'),
+    path('api/internal/analytics/<str:city>/', analytics_view, name='internal-weather-analytics'),
+    path('api/internal/analytics/<str:city>/preview/', preview_view, name='weather-data-preview'),
     path('api/internal/analytics/<str:city>/download/', WeatherDataDownloadAPI.as_view(), name='weather-data-download'),
-    path('api/weather/top-cities', TopCitiesAPI.as_view(), name='top-cities-api'),
+    path('api/weather/top-cities', top_cities_view, name='top-cities-api'),
+    path('api/weather/batch/', batch_view, name='weather-batch'),
+    path('api/internal/stats/', InternalStatsAPI.as_view(), name='internal-stats'),
+    path('api/internal/forecasts/refresh/', ForecastRefreshAPI.as_view(), name='forecast-refresh'),
+    path('api/internal/observations/refresh/', ObservationRefreshAPI.as_view(), name='observation-refresh'),
+    path('metrics', metrics_view, name='metrics'),
     path('api/', include('forelast_backend.apps.auth_service.urls')),
     path('api/', include('forelast_backend.apps.email_services.urls')),
     path('', TemplateView.as_view(template_name='index.html')),
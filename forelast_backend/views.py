@@ -2,13 +2,37 @@ from django.http import JsonResponse
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import pandas as pd
-from supabase import create_client
-import os
+from django.conf import settings
 from dotenv import load_dotenv
 import logging
+import json
 from datetime import datetime, timedelta
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from itertools import chain
+from .supabase_client import get_supabase_client, get_client_stats
+from .top_cities import get_top_cities, refresh_top_cities_snapshot
+from .forecast_cache import get_forecast_row, invalidate_forecasts, get_forecast_cache_stats
+from .weather_export import (
+    EXPORT_FORMATS, COLUMNAR_FORMATS, pa, iter_city_pages,
+    stream_csv, stream_ndjson, stream_arrow, stream_parquet, gzip_stream
+)
+from .cities import NCR_CITIES, get_weather_table_name
+from .date_index import get_date_index, refresh_date_indexes
+from .http_caching import conditional_data_response, bump_data_versions
+from .internal_auth import internal_token_error, internal_token_required
+from .analytics_snapshots import (
+    get_analytics_snapshot, build_analytics_snapshot,
+    render_analytics_snapshot, refresh_analytics_snapshots
+)
+from .apps.zephyr_ai.utils import get_nlp_stats
+from .apps.zephyr_ai.completion_cache import get_completion_cache_stats
+from .apps.zephyr_ai.deepseek_client import get_deepseek_stats
+from .apps.zephyr_ai.intent_router import get_route_stats
+from .apps.zephyr_ai.history import get_history_stats
+from .apps.email_services.outbox import get_outbox_stats
+from .batch_weather import (
+    BATCH_PARTS, current_weather_payload, resolve_cities, fetch_batch, render_batch
+)
 
 load_dotenv()
 
@@ -23,36 +47,21 @@ class CurrentWeatherAPI(View):
     def dispatch(self, *args, **kwargs):
         return super().dispatch(*args, **kwargs)
 
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_CURRENT))
     def get(self, request, city):
         try:
-            supabase = self._get_supabase_client()
-            forecast_table = self._get_forecast_table_name(city)
-            today = datetime.now().date().strftime('%Y-%m-%d')
+            current_data = get_forecast_row(city)
             
-            response = supabase.table(forecast_table)\
-                .select("*")\
-                .eq('datetime', today)\
-                .order('datetime', desc=True)\
-                .limit(1)\
-                .execute()
-            
-            if not response.data:
+            if not current_data:
                 return JsonResponse(
                     {'error': 'No forecast data available'}, 
                     status=404
                 )
-                
-            current_data = response.data[0]
 
-            return JsonResponse({
-                'city': city.title(),
-                'temperature': current_data.get('temp', '--'),
-                'weather_condition': self._get_weather_condition(current_data),
-                'humidity': current_data.get('humidity', '--'),
-                'precip': current_data.get('precip', 0),
-                'windspeed': current_data.get('windspeed', '--'),
-                'last_updated': datetime.now().isoformat()
-            }, content_type="application/json")
+            return JsonResponse(
+                current_weather_payload(city, current_data),
+                content_type="application/json"
+            )
             
         except Exception as e:
             logger.error(f"Error fetching current weather for {city}: {str(e)}")
@@ -61,75 +70,20 @@ class CurrentWeatherAPI(View):
                 status=500
             )
 
-    def _get_supabase_client(self):
-        """Initialize and return Supabase client"""
-        return create_client(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY')
-        )
-
-    def _get_forecast_table_name(self, city):
-        """Get table name for forecast data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_forecast"
-
-    def _normalize_city_name(self, city):
-        """Normalize city name for table lookup"""
-        city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
-        special_cases = {
-            "las_piñas": "las_pinas",
-            "marikina": "markina",
-            "parañaque": "paranaque",
-            "caloocan": "caloocan",
-            "quezon_city": "quezon",
-            "manila": "manila"
-        }
-        return special_cases.get(city, city)
-
-    def _get_weather_condition(self, data):
-        """Determine weather condition based on weather data"""
-        temp = data.get('temp', 0)
-        precip = data.get('precip', 0)
-        
-        if (temp >= 26 or temp <= 20) and precip > 50:
-            return 'Rainy'
-        elif temp > 27:
-            return 'Sunny'
-        elif temp > 23:
-            return 'Partly Cloudy'
-        else:
-            return 'Cloudy'
-
 @method_decorator(csrf_exempt, name='dispatch')
 class WeatherAnalyticsAPI(View):
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_ANALYTICS))
     def get(self, request, city):
         try:
-            supabase = self._get_supabase_client()
-            
-            # Get normalized table names
-            weather_table = self._get_weather_table_name(city)
-            forecast_table = self._get_forecast_table_name(city)
-            
-            # Get historical data (14 days) from weather table
-            historical = self._fetch_historical_data(supabase, weather_table)
-            
-            # Get forecast data (7 days) from forecast table
-            forecast = self._fetch_forecast_data(supabase, forecast_table)
-            
-            # Process and combine data
-            response_data = {
-                'city': city.title(),
-                'historical': self._process_data(historical),
-                'forecast': self._process_data(forecast),
-                'combined': self._process_data(pd.concat([historical, forecast])),
-                'last_updated': datetime.now().isoformat(),
-                'tables_used': {
-                    'historical': weather_table,
-                    'forecast': forecast_table
-                }
-            }
-            
-            return JsonResponse(response_data)
+            # Serve the precomputed payload; build it live only when missing
+            body = get_analytics_snapshot(city)
+            if body is None:
+                body = build_analytics_snapshot(city)
+            
+            return HttpResponse(
+                render_analytics_snapshot(city, body),
+                content_type='application/json'
+            )
             
         except Exception as e:
             logger.error(f"Error processing request for {city}: {str(e)}")
@@ -137,89 +91,6 @@ class WeatherAnalyticsAPI(View):
                 {'error': 'Failed to fetch weather data', 'details': str(e)},
                 status=500
             )
-
-    def _get_supabase_client(self):
-        """Initialize and return Supabase client"""
-        return create_client(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY')
-        )
-
-    def _get_weather_table_name(self, city):
-        """Get table name for historical weather data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_weather"
-
-    def _get_forecast_table_name(self, city):
-        """Get table name for forecast data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_forecast"
-
-    def _normalize_city_name(self, city):
-        """Normalize city name for table lookup"""
-        city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
-        
-        # Handle all possible Philippine city name variations
-        special_cases = {
-            "las_piñas": "las_pinas",
-            "marikina": "markina",
-            "parañaque": "paranaque",
-            "caloocan": "caloocan",
-            "quezon_city": "quezon",
-            "manila": "manila"
-        }
-        return special_cases.get(city, city)
-
-    def _fetch_historical_data(self, supabase, table_name):
-        """Fetch last 14 days of historical data"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=14)
-        
-        logger.info(f"Fetching historical data from {table_name}")
-        
-        response = supabase.table(table_name)\
-            .select("*")\
-            .gte('datetime', start_date.isoformat())\
-            .lte('datetime', end_date.isoformat())\
-            .order('datetime', desc=False   )\
-            .execute()
-            
-        logger.info(f"Found {len(response.data)} historical records")
-        return pd.DataFrame(response.data)
-
-    def _fetch_forecast_data(self, supabase, table_name):
-        """Fetch next 7 days of forecast data"""
-        logger.info(f"Fetching forecast data from {table_name}")
-        
-        response = supabase.table(table_name)\
-            .select("*")\
-            .gte('datetime', datetime.now().isoformat())\
-            .order('datetime')\
-            .limit(8)\
-            .execute()
-            
-        logger.info(f"Found {len(response.data)} forecast records")
-        return pd.DataFrame(response.data)
-
-    def _process_data(self, df):
-        """Process DataFrame into API-ready format"""
-        if df.empty:
-            return {
-                'dates': [],
-                'temp': [],
-                'humidity': [],
-                'precip': [],
-                'windspeed': []
-            }
-            
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        return {
-            'dates': df['datetime'].dt.strftime('%b %d').tolist(),
-            'temp': df['temp'].round(1).tolist(),
-            'humidity': df['humidity'].round(1).tolist(),
-            'precip': df['precip'].round(1).tolist(),
-            'windspeed': df['windspeed'].round(1).tolist()
-        }
         
 class WeatherDataDownloadAPI(View):
     """API endpoint for downloading weather data as CSV"""
@@ -255,19 +126,51 @@ class WeatherDataDownloadAPI(View):
                     status=400
                 )
             
-            supabase = self._get_supabase_client()
-            weather_table = self._get_weather_table_name(city)
+            export_format = request.GET.get('format', 'csv').lower()
+            if export_format not in EXPORT_FORMATS:
+                return JsonResponse(
+                    {'error': f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}"},
+                    status=400
+                )
             
-            logger.info(f"Fetching data from {weather_table} between {start_date} and {end_date}")
+            if export_format in COLUMNAR_FORMATS and pa is None:
+                return JsonResponse(
+                    {'error': f'{export_format} export is not available on this server'},
+                    status=501
+                )
             
-            # Fetch data within date range
+            compression = request.GET.get('compression', '')
+            if compression not in ('', 'gzip'):
+                return JsonResponse(
+                    {'error': 'Invalid compression. Use gzip or omit it'},
+                    status=400
+                )
+            
+            if compression and export_format in COLUMNAR_FORMATS:
+                return JsonResponse(
+                    {'error': f'{export_format} output is already compressed'},
+                    status=400
+                )
+            
+            cities, unknown = self._get_requested_cities(request, city)
+            if unknown:
+                return JsonResponse(
+                    {'error': f"Unknown cities: {', '.join(unknown)}"},
+                    status=400
+                )
+            
+            if len(cities) > 1 and export_format != 'parquet':
+                return JsonResponse(
+                    {'error': 'Multi-city exports are only available with format=parquet'},
+                    status=400
+                )
+            
+            logger.info(f"Streaming {export_format} data for {', '.join(cities)} between {start_date} and {end_date}")
+            
+            # Fetch the first page up front so errors can still become JSON responses
+            pages = iter_city_pages(cities, start_date, end_date, skip_missing=len(cities) > 1)
             try:
-                query_result = supabase.table(weather_table)\
-                        .select("*")\
-                        .gte('datetime', start_date.isoformat())\
-                        .lte('datetime', end_date.isoformat())\
-                        .order('datetime')\
-                        .execute()
+                first_page = next(pages, None)
             except Exception as e:
                 if "relation" in str(e) and "does not exist" in str(e):
                     return JsonResponse(
@@ -275,21 +178,36 @@ class WeatherDataDownloadAPI(View):
                         status=404
                     )
                 raise
-                
-            logger.info(f"Found {len(query_result.data)} records")
             
-            if not query_result.data:
+            if not first_page:
                 return JsonResponse(
                     {'error': 'No data available for the selected date range'},
                     status=404
                 )
                 
-            # Create CSV response
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{city}_weather_data_{start_date}_to_{end_date}.csv"'
-            
-            df = pd.DataFrame(query_result.data)
-            df.to_csv(response, index=False)
+            # Stream rows page by page so memory stays flat for any range
+            city_pages = chain([first_page], pages)
+            if export_format == 'parquet':
+                chunks = stream_parquet(city_pages, with_city=len(cities) > 1)
+            else:
+                row_pages = (page for _, page in city_pages)
+                if export_format == 'arrow':
+                    chunks = stream_arrow(row_pages)
+                elif export_format == 'ndjson':
+                    chunks = stream_ndjson(row_pages)
+                else:
+                    chunks = stream_csv(row_pages)
+            
+            content_type, extension = EXPORT_FORMATS[export_format]
+            name = 'multi_city' if len(cities) > 1 else city
+            filename = f"{name}_weather_data_{start_date}_to_{end_date}.{extension}"
+            
+            if compression == 'gzip':
+                response = StreamingHttpResponse(gzip_stream(chunks), content_type='application/gzip')
+                filename += '.gz'
+            else:
+                response = StreamingHttpResponse(chunks, content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
             return response
             
         except Exception as e:
@@ -299,33 +217,114 @@ class WeatherDataDownloadAPI(View):
                 status=500
             )
 
-    def _get_supabase_client(self):
-        """Initialize and return Supabase client"""
-        return create_client(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY')
+    def _get_requested_cities(self, request, city):
+        """Return the cities to export (?cities=a,b, "all", or the URL city) and any unknown names"""
+        requested = [name.strip() for name in request.GET.get('cities', '').split(',') if name.strip()]
+        if not requested:
+            return [city], []
+        return resolve_cities(requested)
+    
+def _parse_preview_request(request):
+    """Validate a preview request; returns (params, None) or (None, error response)"""
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    
+    if not start_date or not end_date:
+        return None, JsonResponse(
+            {'error': 'Both start_date and end_date parameters are required'},
+            status=400
+        )
+    
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return None, JsonResponse(
+            {'error': 'Invalid date format. Use YYYY-MM-DD'},
+            status=400
+        )
+    
+    if start_date > end_date:
+        return None, JsonResponse(
+            {'error': 'Start date cannot be after end date'},
+            status=400
         )
+    
+    try:
+        page_size = int(request.GET.get('page_size', 10))
+    except ValueError:
+        page_size = 0
+    if not 1 <= page_size <= settings.PREVIEW_MAX_PAGE_SIZE:
+        return None, JsonResponse(
+            {'error': f'page_size must be between 1 and {settings.PREVIEW_MAX_PAGE_SIZE}'},
+            status=400
+        )
+    
+    # The cursor is the datetime of the last row the client has seen
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor = datetime.strptime(cursor[:10], '%Y-%m-%d').date().isoformat()
+        except ValueError:
+            return None, JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    return {'start_date': start_date, 'end_date': end_date, 'page_size': page_size, 'cursor': cursor}, None
 
-    def _get_weather_table_name(self, city):
-        """Get table name for historical weather data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_weather"
 
-    def _normalize_city_name(self, city):
-        """Normalize city name for table lookup"""
-        city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
-        
-        # Handle all possible Philippine city name variations
-        special_cases = {
-            "las_piñas": "las_pinas",
-            "marikina": "markina",
-            "parañaque": "paranaque",
-            "caloocan": "caloocan",
-            "quezon_city": "quezon",
-            "manila": "manila"
-        }
-        return special_cases.get(city, city)
+def _preview_page_query(supabase, city, params):
+    """Unexecuted query for one preview page; works with the sync and async clients"""
+    weather_table = get_weather_table_name(city)
+    logger.info(f"Fetching preview data from {weather_table} between {params['start_date']} and {params['end_date']}")
+    
+    # Keyset paging: continue after the cursor instead of using OFFSET
+    query = supabase.table(weather_table).select("*")
+    if params['cursor']:
+        query = query.gt('datetime', params['cursor'])
+    else:
+        query = query.gte('datetime', params['start_date'].isoformat())
+    
+    return query\
+        .lte('datetime', params['end_date'].isoformat())\
+        .order('datetime')\
+        .limit(params['page_size'])
+
+
+def _preview_count_query(supabase, city, params):
+    """Unexecuted exact count, for when the date index has not been built yet"""
+    return supabase.table(get_weather_table_name(city))\
+        .select("count", count="exact")\
+        .gte('datetime', params['start_date'].isoformat())\
+        .lte('datetime', params['end_date'].isoformat())
+
+
+def _preview_response(rows, params, index, exact_count=None):
+    """Build the preview body from a page of rows and either the date index or an exact count"""
+    if not rows and not params['cursor']:
+        return JsonResponse(
+            {'error': 'No data available for the selected date range'},
+            status=404
+        )
+    
+    last_seen = rows[-1]['datetime'] if rows else None
+    if index is not None:
+        # Counts come from the per-city date index instead of count="exact"
+        total_records = index.count(params['start_date'], params['end_date'])
+        if last_seen:
+            last_date = datetime.strptime(str(last_seen)[:10], '%Y-%m-%d').date()
+            has_more = index.count(last_date + timedelta(days=1), params['end_date']) > 0
+        else:
+            has_more = False
+    else:
+        total_records = exact_count
+        has_more = len(rows) == params['page_size']
     
+    return JsonResponse({
+        'preview': rows,
+        'total_records': total_records,
+        'next_cursor': last_seen if has_more else None
+    })
+
+
 class WeatherDataPreviewAPI(View):
     """API endpoint for previewing weather data"""
     
@@ -334,65 +333,22 @@ class WeatherDataPreviewAPI(View):
         return super().dispatch(*args, **kwargs)
 
     def get(self, request, city):
+        params, error = _parse_preview_request(request)
+        if error:
+            return error
+        
         try:
-            # Validate and parse dates
-            start_date = request.GET.get('start_date')
-            end_date = request.GET.get('end_date')
-            
-            if not start_date or not end_date:
-                return JsonResponse(
-                    {'error': 'Both start_date and end_date parameters are required'},
-                    status=400
-                )
-            
-            try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            except ValueError:
-                return JsonResponse(
-                    {'error': 'Invalid date format. Use YYYY-MM-DD'},
-                    status=400
-                )
-            
-            if start_date > end_date:
-                return JsonResponse(
-                    {'error': 'Start date cannot be after end date'},
-                    status=400
-                )
-            
-            supabase = self._get_supabase_client()
-            weather_table = self._get_weather_table_name(city)
-            
-            logger.info(f"Fetching preview data from {weather_table} between {start_date} and {end_date}")
-            
-            # First get total count
-            count_response = supabase.table(weather_table)\
-                .select("count", count="exact")\
-                .gte('datetime', start_date.isoformat())\
-                .lte('datetime', end_date.isoformat())\
-                .execute()
-            
-            total_records = count_response.count
-            
-            # Then get preview data (first 10 records)
-            response = supabase.table(weather_table)\
-                .select("*")\
-                .gte('datetime', start_date.isoformat())\
-                .lte('datetime', end_date.isoformat())\
-                .order('datetime')\
-                .limit(10)\
-                .execute()
-                
-            if not response.data:
-                return JsonResponse(
-                    {'error': 'No data available for the selected date range'},
-                    status=404
-                )
-                
-            return JsonResponse({
-                'preview': response.data,
-                'total_records': total_records
-            })
+            supabase = get_supabase_client()
+            rows = _preview_page_query(supabase, city, params).execute().data
+            if not rows and not params['cursor']:
+                return _preview_response(rows, params, None)
+            
+            # Not built yet (the observation refresh hook builds it); never scan here
+            index = get_date_index(city)
+            exact_count = None
+            if index is None:
+                exact_count = _preview_count_query(supabase, city, params).execute().count
+            return _preview_response(rows, params, index, exact_count)
             
         except Exception as e:
             logger.error(f"Error previewing data for {city}: {str(e)}", exc_info=True)
@@ -401,34 +357,6 @@ class WeatherDataPreviewAPI(View):
                 status=500
             )
 
-    # Include all the same helper methods as in WeatherDataDownloadAPI
-    def _get_supabase_client(self):
-        """Initialize and return Supabase client"""
-        return create_client(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY')
-        )
-
-    def _get_weather_table_name(self, city):
-        """Get table name for historical weather data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_weather"
-
-    def _normalize_city_name(self, city):
-        """Normalize city name for table lookup"""
-        city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
-        
-        # Handle all possible Philippine city name variations
-        special_cases = {
-            "las_piñas": "las_pinas",
-            "marikina": "markina",
-            "parañaque": "paranaque",
-            "caloocan": "caloocan",
-            "quezon_city": "quezon",
-            "manila": "manila"
-        }
-        return special_cases.get(city, city)
-
 class TopCitiesAPI(View):
     """API endpoint for getting top cities by temperature"""
     
@@ -436,47 +364,10 @@ class TopCitiesAPI(View):
     def dispatch(self, *args, **kwargs):
         return super().dispatch(*args, **kwargs)
 
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_TOP_CITIES, per_city=False))
     def get(self, request):
         try:
-            supabase = self._get_supabase_client()
-            
-            # Get current date
-            today = datetime.now().date().isoformat()
-            
-            # We'll check forecast tables for major cities
-            cities = [
-                "Manila", "Quezon City", "Caloocan", "Las Piñas", "Makati",
-                "Malabon", "Mandaluyong", "Marikina", "Muntinlupa", "Navotas",
-                "Parañaque", "Pasay", "Pasig", "San Juan", "Taguig", "Valenzuela"
-            ]
-            
-            top_cities = []
-            
-            for city in cities:
-                table_name = self._get_forecast_table_name(city)
-                try:
-                    response = supabase.table(table_name)\
-                        .select("temp")\
-                        .eq('datetime', today)\
-                        .limit(1)\
-                        .execute()
-                    
-                    if response.data:
-                        top_cities.append({
-                            'city': city,
-                            'temp': response.data[0].get('temp', 0)
-                        })
-                except Exception as e:
-                    logger.warning(f"Could not fetch data for {city}: {str(e)}")
-                    continue
-            
-            # Sort by temperature (descending) and take top 5
-            top_cities_sorted = sorted(top_cities, key=lambda x: x['temp'], reverse=True)[:5]
-            
-            return JsonResponse({
-                'top_cities': top_cities_sorted,
-                'last_updated': datetime.now().isoformat()
-            })
+            return JsonResponse(get_top_cities())
             
         except Exception as e:
             logger.error(f"Error fetching top cities: {str(e)}")
@@ -485,27 +376,156 @@ class TopCitiesAPI(View):
                 status=500
             )
 
-    def _get_supabase_client(self):
-        """Initialize and return Supabase client"""
-        return create_client(
-            os.getenv('SUPABASE_URL'), 
-            os.getenv('SUPABASE_KEY')
+
+def _parse_batch_request(request):
+    """Read ?cities= and ?include= for the batch endpoint"""
+    requested = [name.strip() for name in request.GET.get('cities', '').split(',') if name.strip()]
+    if not requested:
+        return None, None, None, JsonResponse(
+            {'error': 'cities parameter is required (comma-separated names or "all")'},
+            status=400
         )
 
-    def _get_forecast_table_name(self, city):
-        """Get table name for forecast data"""
-        base_name = self._normalize_city_name(city)
-        return f"{base_name}_city_forecast"
-
-    def _normalize_city_name(self, city):
-        """Normalize city name for table lookup"""
-        city = city.lower().strip().replace(' ', '_').replace('ñ', 'n')
-        special_cases = {
-            "las_piñas": "las_pinas",
-            "marikina": "markina",
-            "parañaque": "paranaque",
-            "caloocan": "caloocan",
-            "quezon_city": "quezon",
-            "manila": "manila"
-        }
-        return special_cases.get(city, city)
\ No newline at end of file
+    include = request.GET.get('include', ','.join(BATCH_PARTS))
+    parts = [part.strip() for part in include.split(',') if part.strip()]
+    if not parts or any(part not in BATCH_PARTS for part in parts):
+        return None, None, None, JsonResponse(
+            {'error': f"Invalid include. Use any of: {', '.join(BATCH_PARTS)}"},
+            status=400
+        )
+
+    cities, unknown = resolve_cities(requested)
+    return cities, unknown, parts, None
+
+
+def _batch_errors(errors, unknown):
+    for name in unknown:
+        errors[name] = {'city': 'Unknown city'}
+    return errors
+
+
+class BatchWeatherAPI(View):
+    """API endpoint for current conditions and analytics of several cities at once"""
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    @method_decorator(conditional_data_response(settings.HTTP_MAX_AGE_CURRENT, per_city=False))
+    def get(self, request):
+        cities, unknown, parts, error = _parse_batch_request(request)
+        if error:
+            return error
+
+        try:
+            results, errors = fetch_batch(cities, parts)
+            return HttpResponse(
+                render_batch(cities, results, _batch_errors(errors, unknown)),
+                content_type='application/json'
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching batch weather data: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to fetch batch weather data', 'details': str(e)},
+                status=500
+            )
+
+
+@method_decorator(internal_token_required, name='get')
+class InternalStatsAPI(View):
+    """API endpoint for per-process data access statistics"""
+
+    def get(self, request):
+        return JsonResponse({
+            'supabase': get_client_stats(),
+            'forecast_cache': get_forecast_cache_stats(),
+            'zephyr_nlp': get_nlp_stats(),
+            'zephyr_completions': get_completion_cache_stats(),
+            'deepseek': get_deepseek_stats(),
+            'zephyr_routes': get_route_stats(),
+            'zephyr_history': get_history_stats(),
+            'email_outbox': get_outbox_stats(),
+        })
+
+
+
+def _parse_refresh_request(request):
+    """Check the internal token and read the cities from a refresh hook call"""
+    error = internal_token_error(request)
+    if error is not None:
+        return None, error
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return None, JsonResponse({'error': 'Invalid JSON format'}, status=400)
+
+    cities = data.get('cities') or ([data['city']] if data.get('city') else [])
+    return cities, None
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ForecastRefreshAPI(View):
+    """API endpoint the forecast pipeline calls after writing new forecasts"""
+
+    def post(self, request):
+        cities, error = _parse_refresh_request(request)
+        if error:
+            return error
+
+        try:
+            # Invalidate first so the rebuilds below read the new rows
+            invalidate_forecasts(cities)
+            bump_data_versions(cities)
+            refreshed = {'forecast_cache': True}
+
+            if settings.TOP_CITIES_SNAPSHOT:
+                refresh_top_cities_snapshot()
+                refreshed['top_cities'] = True
+
+            failed = refresh_analytics_snapshots(cities or NCR_CITIES)
+            refreshed['analytics'] = not failed
+
+            logger.info(f"Forecast refresh for {', '.join(cities) or 'all cities'}")
+            return JsonResponse({
+                'cities': cities,
+                'refreshed': refreshed,
+                'failed': failed
+            })
+
+        except Exception as e:
+            logger.error(f"Error refreshing forecast data: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to refresh forecast data', 'details': str(e)},
+                status=500
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ObservationRefreshAPI(View):
+    """API endpoint the weather fetcher calls after ingesting new observations"""
+
+    def post(self, request):
+        cities, error = _parse_refresh_request(request)
+        if error:
+            return error
+
+        try:
+            bump_data_versions(cities)
+            failed = refresh_analytics_snapshots(cities or NCR_CITIES)
+            index_failed = refresh_date_indexes(cities or NCR_CITIES)
+
+            logger.info(f"Observation refresh for {', '.join(cities) or 'all cities'}")
+            return JsonResponse({
+                'cities': cities,
+                'refreshed': {'analytics': not failed, 'date_index': not index_failed},
+                'failed': sorted(set(failed) | set(index_failed))
+            })
+
+        except Exception as e:
+            logger.error(f"Error refreshing observation data: {str(e)}")
+            return JsonResponse(
+                {'error': 'Failed to refresh observation data', 'details': str(e)},
+                status=500
+            )
\ No newline at end of file
@@ -0,0 +1,259 @@
+import csv
+import json
+import logging
+import zlib
+from datetime import date
+
+from django.conf import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from .cities import get_weather_table_name
+from .supabase_client import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Formats that need pyarrow and already compress internally
+COLUMNAR_FORMATS = ('arrow', 'parquet')
+
+# Columns of the weather_data_* tables, in export order. Columnar exports use
+# these fixed types instead of guessing from a row, because measurements such
+# as windgust, snow or severerisk are often null in any given row.
+WEATHER_COLUMNS = (
+    'id', 'name', 'datetime', 'tempmax', 'tempmin', 'temp', 'feelslikemax', 'feelslikemin',
+    'feelslike', 'dew', 'humidity', 'precip', 'precipprob', 'precipcover', 'preciptype',
+    'snow', 'snowdepth', 'windgust', 'windspeed', 'winddir', 'sealevelpressure',
+    'cloudcover', 'visibility', 'solarradiation', 'solarenergy', 'uvindex', 'severerisk',
+    'sunrise', 'sunset', 'moonphase', 'conditions', 'description', 'icon', 'stations',
+)
+WEATHER_TEXT_COLUMNS = ('name', 'preciptype', 'sunrise', 'sunset', 'conditions', 'description', 'icon', 'stations')
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def keyset_filter(row):
+    """PostgREST ``or`` filter for the rows that sort after ``row`` on (datetime, id)
+
+    ``datetime`` is not unique (stations can report the same day twice), so
+    ``id`` breaks ties and no row is skipped at a page boundary.
+    """
+    return f"datetime.gt.{row['datetime']},and(datetime.eq.{row['datetime']},id.gt.{row['id']})"
+
+
+def iter_weather_pages(city, start_date, end_date, page_size=None):
+    """Yield pages of weather rows between two dates, oldest first
+
+    Uses keyset pagination on ``(datetime, id)`` so every page is an index
+    range scan and the PostgREST row cap never truncates a range.
+    """
+    page_size = page_size or settings.DOWNLOAD_PAGE_SIZE
+    supabase = get_supabase_client()
+    table_name = get_weather_table_name(city)
+    last_row = None
+
+    while True:
+        query = supabase.table(table_name).select("*").gte('datetime', start_date.isoformat())
+        if last_row is not None:
+            query = query.or_(keyset_filter(last_row))
+
+        response = query\
+            .lte('datetime', end_date.isoformat())\
+            .order('datetime')\
+            .order('id')\
+            .limit(page_size)\
+            .execute()
+
+        page = response.data
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < page_size:
+            return
+        last_row = page[-1]
+
+
+def stream_csv(pages):
+    """Turn pages of rows into CSV text chunks, one chunk per page"""
+    writer = None
+    buffer = Echo()
+
+    for page in pages:
+        chunk = []
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(page[0].keys()), extrasaction='ignore')
+            chunk.append(writer.writeheader())
+        chunk.extend(writer.writerow(row) for row in page)
+        yield ''.join(chunk).encode('utf-8')
+
+
+def gzip_stream(chunks):
+    """Compress a byte stream incrementally into a single gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_city_pages(cities, start_date, end_date, skip_missing=False):
+    """Yield (city, page) for each city in turn
+
+    With ``skip_missing`` cities without a weather table are logged and
+    skipped instead of failing the whole export.
+    """
+    for city in cities:
+        try:
+            for page in iter_weather_pages(city, start_date, end_date):
+                yield city, page
+        except Exception as e:
+            if skip_missing and "relation" in str(e) and "does not exist" in str(e):
+                logger.warning(f"Skipping {city} in export: no weather table")
+                continue
+            raise
+
+
+def stream_ndjson(pages):
+    """Turn pages of rows into newline-delimited JSON chunks"""
+    for page in pages:
+        yield ''.join(json.dumps(row, default=str) + '\n' for row in page).encode('utf-8')
+
+
+def _arrow_schema(with_city=False):
+    """Typed schema for weather rows
+
+    ``datetime`` is a real date, ``id`` an int64, the text columns strings and
+    every other measurement float32, whatever the first rows happen to hold.
+    """
+    fields = [pa.field('city', pa.string())] if with_city else []
+    for name in WEATHER_COLUMNS:
+        if name == 'datetime':
+            fields.append(pa.field(name, pa.date32()))
+        elif name == 'id':
+            fields.append(pa.field(name, pa.int64()))
+        elif name in WEATHER_TEXT_COLUMNS:
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.float32()))
+    return pa.schema(fields)
+
+
+def _to_date(value):
+    if value is None:
+        return None
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_number(value, convert):
+    # Older loads stored a missing measurement as an empty string
+    if value is None or value == '':
+        return None
+    return convert(value)
+
+
+def _page_to_batch(page, schema, city=None):
+    """Convert a page of row dicts into a record batch matching the schema"""
+    columns = []
+    for field in schema:
+        if field.name == 'city' and city is not None:
+            values = [city] * len(page)
+        elif pa.types.is_date32(field.type):
+            values = [_to_date(row.get(field.name)) for row in page]
+        elif pa.types.is_string(field.type):
+            values = [None if row.get(field.name) is None else str(row.get(field.name)) for row in page]
+        else:
+            convert = int if pa.types.is_integer(field.type) else float
+            values = [_to_number(row.get(field.name), convert) for row in page]
+        columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ChunkSink:
+    """Write-only file that buffers output until drained
+
+    ``tell()`` keeps counting across drains, which Parquet needs to record
+    row group offsets in its footer.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_arrow(pages):
+    """Write pages as one Arrow IPC stream, yielding each record batch as it is encoded"""
+    sink = ChunkSink()
+    writer = None
+
+    for page in pages:
+        if writer is None:
+            schema = _arrow_schema()
+            writer = pa.ipc.new_stream(pa.PythonFile(sink, mode='w'), schema)
+        writer.write_batch(_page_to_batch(page, schema))
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def stream_parquet(city_pages, with_city=False):
+    """Write (city, page) pairs as one Parquet file, one row group per page
+
+    With ``with_city`` a ``city`` column is added so several cities can
+    share one file.
+    """
+    sink = ChunkSink()
+    writer = None
+
+    for city, page in city_pages:
+        if writer is None:
+            schema = _arrow_schema(with_city=with_city)
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='zstd')
+        writer.write_batch(_page_to_batch(page, schema, city if with_city else None))
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
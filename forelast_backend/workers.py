@@ -0,0 +1,20 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_lock = threading.Lock()
+_executors = {}
+
+
+def get_executor(name, max_workers):
+    """Return this process's bounded worker pool for ``name``, creating it on first use"""
+    pid = os.getpid()
+    entry = _executors.get(name)
+    if entry is None or entry[1] != pid:
+        with _lock:
+            # Threads do not survive a fork, so each worker gets its own pools
+            entry = _executors.get(name)
+            if entry is None or entry[1] != pid:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                entry = _executors[name] = (executor, pid)
+    return entry[0]
@@ -152,11 +152,28 @@ def verify_tables():
         return False
     return True
 
+def notify_observations_written(saved_cities):
+    """Tell the backend new observations landed so it can rebuild its snapshots"""
+    api_url = os.getenv('FORELAST_API_URL')
+    if not api_url or not saved_cities:
+        return
+    
+    try:
+        requests.post(
+            f"{api_url.rstrip('/')}/api/internal/observations/refresh/",
+            json={'cities': saved_cities},
+            headers={'X-Internal-Token': os.getenv('INTERNAL_API_TOKEN', '')},
+            timeout=30
+        ).raise_for_status()
+    except requests.RequestException as e:
+        print(f"Backend refresh notification failed: {str(e)}")
+
 def main():
     if not verify_tables():
         print("Please create the missing tables first")
         return
     
+    saved_cities = []
     for city in cities:
         print(f"\n{'='*30}\nProcessing {city}...")
         weather_data = fetch_daily_weather(city)
@@ -164,8 +181,10 @@ def main():
             continue
             
         new_entries = append_to_csv(city, weather_data)
-        if new_entries:
-            save_to_supabase(city, new_entries)
+        if new_entries and save_to_supabase(city, new_entries):
+            saved_cities.append(city)
+    
+    notify_observations_written(saved_cities)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file